@@ -5,11 +5,20 @@ import psycopg2
 from werkzeug.security import generate_password_hash, check_password_hash
 import os
 import psycopg2.extras # Import psycopg2.extras for DictCursor
-import math
 import logging
 import json
-from groq import Groq
+import threading
+import time
 import base64
+from analysis_cache import analysis_cache_key, get_analysis_cache
+from ingredient_index import get_ingredient_index, refresh_ingredient_index
+from job_queue import JobQueue
+from image_variants import image_hashes, make_variants
+from ingredient_annotations import get_ingredient_annotations
+from llm_client import CircuitOpenError, get_llm_client, register_llm_stats_route
+from suggestion_index import notify_product_change
+from local_verdict import EXPLANATION_PENDING, EXPLANATION_UNAVAILABLE, local_analysis, map_verdict, split_by_contribution
+from db import get_db_connection, register_pool_stats_route
 
 # Configure basic logging
 logging.basicConfig(level=logging.INFO)
@@ -17,21 +26,27 @@ logging.basicConfig(level=logging.INFO)
 # Initialize the Flask application
 app = Flask(__name__)
 CORS(app) # Enable CORS for all routes
-
-# --- Database Connection Setup ---
-def get_db_connection():
-    conn = psycopg2.connect(
-        host="",
-        database="",
-        user="",
-        password=""
-    )
-    return conn
+register_pool_stats_route(app) # Connections come from the shared pool in db.py
+register_llm_stats_route(app) # LLM calls go through the shared client in llm_client.py
 
 # --- Ingredient Search Function ---
+# Rebuild the in-memory ingredient index after this many seconds (unset = never).
+INGREDIENT_INDEX_MAX_AGE = float(os.environ['INGREDIENT_INDEX_MAX_AGE']) if os.environ.get('INGREDIENT_INDEX_MAX_AGE') else None
+
 def find_ingredient_in_db(ingredient_name, skin_type, cur):
+    """
+    Resolves an ingredient from the in-memory index, falling back to the
+    SQL cascade only when the index has no match.
+    """
+    index = get_ingredient_index(cur, max_age=INGREDIENT_INDEX_MAX_AGE)
+    result = index.lookup(ingredient_name, skin_type)
+    if result:
+        return result
+    return find_ingredient_in_db_sql(ingredient_name, skin_type, cur)
+
+def find_ingredient_in_db_sql(ingredient_name, skin_type, cur):
     ing_lower = ingredient_name.lower()
-    skin_type_lower = skin_type.lower()
+    skin_type_lower = (skin_type or '').lower()
     #Exact match + specific skin type:
     cur.execute(
         "SELECT * FROM ingredients WHERE LOWER(ingredient_name) = %s AND %s = ANY(skin_type)",
@@ -140,6 +155,62 @@ def find_ingredient_in_db(ingredient_name, skin_type, cur):
     return None
 
 
+# --- Groq Model / Prompt Versioning ---
+# Bump PROMPT_VERSION whenever the prompt below changes so cached analyses are not reused.
+GROQ_MODEL = "qwen/qwen3-32b"
+PROMPT_VERSION = "seller-v2"
+# Explanation returned when the Groq call fails; such results are never stored over a local one.
+ANALYSIS_ERROR_EXPLANATION = "An unexpected error occurred during analysis."
+
+# --- Weighted scoring ---
+# Keyword-based verdict mapping and the position buckets live in local_verdict.py
+WEIGHT_MAPPING = {"high": 3, "moderate": 2, "least": 1}
+
+def compute_overall_verdict(highly_contributing_list, moderate_ingredients_list, least_contributing_list):
+    """Weighted good/bad score across the high/moderate/least buckets. Does not modify the ingredients."""
+    good_score = 0
+    bad_score = 0
+    for weight, ing_list in ((WEIGHT_MAPPING["high"], highly_contributing_list),
+                             (WEIGHT_MAPPING["moderate"], moderate_ingredients_list),
+                             (WEIGHT_MAPPING["least"], least_contributing_list)):
+        for ing in ing_list:
+            verdict = map_verdict(ing.get('verdict', 'unknown'))
+            if verdict == "good":
+                good_score += weight
+            elif verdict == "bad":
+                bad_score += weight
+
+    if bad_score > good_score:
+        return "Bad"
+    elif any(map_verdict(ing.get('verdict', 'unknown')) == 'bad' for ing in highly_contributing_list):
+        return "Moderate"
+    elif good_score > bad_score:
+        return "Good"
+    else:
+        return "Moderate"
+
+def local_analyze_skincare(product_name, ingredients_list, skin_type):
+    """
+    Fast mode: the locally computed verdict, per-ingredient classifications and a
+    templated explanation, without waiting for the LLM.
+    """
+    if not ingredients_list:
+        return groq_analyze_skincare(product_name, ingredients_list, skin_type)
+    highly, moderate, least = split_by_contribution(ingredients_list)
+    overall_verdict = compute_overall_verdict(highly, moderate, least)
+    result = local_analysis(product_name, skin_type, overall_verdict, highly, moderate, least)
+    result["explanation_status"] = EXPLANATION_PENDING
+    return result
+
+def describe_ingredients(ing_list, known):
+    """Full details for ingredients without a stored annotation, just name and verdict for the rest."""
+    details = [f"Name: {ing['ingredient_name']}, Verdict: {ing['verdict']}, Side Effect: {ing['side_effect']}"
+               for ing, annotation in zip(ing_list, known) if annotation is None]
+    annotated = [f"{annotation['ingredient_name']} ({annotation['verdict']})" for annotation in known if annotation is not None]
+    if annotated:
+        details.append(f"Already annotated: {', '.join(annotated)}")
+    return " , ".join(details)
+
 def groq_analyze_skincare(product_name, ingredients_list, skin_type):
     if not ingredients_list:
         return {
@@ -151,13 +222,14 @@ def groq_analyze_skincare(product_name, ingredients_list, skin_type):
             "summary": {"good": 0, "moderate": 0, "bad": 0}
         }
 
-    total_ingredients = len(ingredients_list)
-    highly_contributing_count = max(1, math.ceil(total_ingredients * 0.1))
-    least_contributing_count = max(1, math.ceil(total_ingredients * 0.3))
+    # The key is computed before the verdicts below are normalized in place.
+    cache = get_analysis_cache()
+    cache_key = analysis_cache_key(product_name, ingredients_list, skin_type, GROQ_MODEL, PROMPT_VERSION)
+    cached_result = cache.get(cache_key)
+    if cached_result is not None:
+        return cached_result
 
-    highly_contributing_list = ingredients_list[:highly_contributing_count]
-    moderate_ingredients_list = ingredients_list[highly_contributing_count:total_ingredients - least_contributing_count]
-    least_contributing_list = ingredients_list[total_ingredients - least_contributing_count:]
+    highly_contributing_list, moderate_ingredients_list, least_contributing_list = split_by_contribution(ingredients_list)
 
     def format_ingredients(ing_list):
         return [
@@ -169,63 +241,20 @@ def groq_analyze_skincare(product_name, ingredients_list, skin_type):
             for ing in ing_list
         ]
 
-    # --- Keyword-based verdict mapping ---
-    BAD_KEYWORDS = ["bad", "danger", "harmful", "toxic"]
-    GOOD_KEYWORDS = ["good", "beneficial", "safe"]
-
-    def map_verdict(verdict):
-        v = verdict.lower()
-        if any(k in v for k in BAD_KEYWORDS):
-            return "bad"
-        elif any(k in v for k in GOOD_KEYWORDS):
-            return "good"
-        else:
-            return "moderate"
-
-    # --- Weighted scoring ---
-    weight_mapping = {"high": 3, "moderate": 2, "least": 1}
-    good_score = 0
-    bad_score = 0
-
-    for ing in highly_contributing_list:
-        verdict = map_verdict(ing.get('verdict', 'unknown'))
-        if verdict == "good":
-            good_score += weight_mapping["high"]
-        elif verdict == "bad":
-            bad_score += weight_mapping["high"]
-        ing['verdict'] = verdict  # normalize for output
-
-    for ing in moderate_ingredients_list:
-        verdict = map_verdict(ing.get('verdict', 'unknown'))
-        if verdict == "good":
-            good_score += weight_mapping["moderate"]
-        elif verdict == "bad":
-            bad_score += weight_mapping["moderate"]
-        ing['verdict'] = verdict
-
-    for ing in least_contributing_list:
-        verdict = map_verdict(ing.get('verdict', 'unknown'))
-        if verdict == "good":
-            good_score += weight_mapping["least"]
-        elif verdict == "bad":
-            bad_score += weight_mapping["least"]
-        ing['verdict'] = verdict
-
     # --- Determine overall verdict ---
-    
-        if bad_score > good_score:
-            overall_verdict = "Bad"
-        elif any(ing['verdict'] == 'bad' for ing in highly_contributing_list):
-             overall_verdict = "Moderate"
-        elif good_score > bad_score:
-            overall_verdict = "Good"
-        else:
-            overall_verdict = "Moderate"
+    overall_verdict = compute_overall_verdict(highly_contributing_list, moderate_ingredients_list, least_contributing_list)
+
+    for ing in ingredients_list:
+        ing['verdict'] = map_verdict(ing.get('verdict', 'unknown'))  # normalize for output
 
     # --- Prepare prompt ---
-    highly_contrib_details = " , ".join([f"Name: {ing['ingredient_name']}, Verdict: {ing['verdict']}, Side Effect: {ing['side_effect']}" for ing in highly_contributing_list])
-    moderate_details = " , ".join([f"Name: {ing['ingredient_name']}, Verdict: {ing['verdict']}, Side Effect: {ing['side_effect']}" for ing in moderate_ingredients_list])
-    least_contrib_details = " , ".join([f"Name: {ing['ingredient_name']}, Verdict: {ing['verdict']}, Side Effect: {ing['side_effect']}" for ing in least_contributing_list])
+    # Only ingredients without a stored annotation are described in full.
+    annotations = get_ingredient_annotations()
+    known = annotations.lookup(ingredients_list, skin_type, PROMPT_VERSION)
+    highly_known, moderate_known, least_known = split_by_contribution(known)
+    highly_contrib_details = describe_ingredients(highly_contributing_list, highly_known)
+    moderate_details = describe_ingredients(moderate_ingredients_list, moderate_known)
+    least_contrib_details = describe_ingredients(least_contributing_list, least_known)
 
     prompt = f"""
 You are a professional skincare product analyst. Your task is to analyze a list of skincare ingredients and provide a concise, accurate verdict and explanation. The ingredients are categorized based on their position, which correlates to their concentration.
@@ -238,12 +267,14 @@ Ingredients categorized by position/concentration:
 - Moderate Ingredients (Next 60%): {moderate_details}
 - Least Contributing (Last 30%): {least_contrib_details}
 
+Ingredients listed under "Already annotated" have been reviewed before. Take them into account for the overall verdict and explanation, but do NOT include them in the ingredient arrays.
+
 Based on this information, provide a single JSON object with the following structure:
 1. **overall_verdict**: A single word verdict from "Good", "Moderate", or "Bad". The verdict has already been determined as "{overall_verdict}".
 2. **overall_explanation**: A brief, single-paragraph explanation for the verdict, considering the ingredients and their effects.
-3. **highly_contributing**: An array of objects for the highly contributing ingredients. The verdict for each ingredient must be a single word: "Good", "Moderate", "Bad", or "Unknown".
-4. **moderate_ingredients**: An array of objects for the moderate ingredients. The verdict for each ingredient must be a single word: "Good", "Moderate", "Bad", or "Unknown".
-5. **least_contributing**: An array of objects for the least contributing ingredients. The verdict for each ingredient must be a single word: "Good", "Moderate", "Bad", or "Unknown".
+3. **highly_contributing**: An array of objects for the highly contributing ingredients that are not already annotated. The verdict for each ingredient must be a single word: "Good", "Moderate", "Bad", or "Unknown".
+4. **moderate_ingredients**: An array of objects for the moderate ingredients that are not already annotated. The verdict for each ingredient must be a single word: "Good", "Moderate", "Bad", or "Unknown".
+5. **least_contributing**: An array of objects for the least contributing ingredients that are not already annotated. The verdict for each ingredient must be a single word: "Good", "Moderate", "Bad", or "Unknown".
 6. **summary**: An object with counts of 'good', 'moderate', and 'bad' verdicts from the entire ingredient list.
 EXPLANATION SHOULD BE IN DETAIL SO THAT THE USER CAN UNDERSTAND WHY THE VERDICT IS GIVEN.
 Respond with a single JSON object. Do NOT include any other text, prefaces, or explanations outside of the JSON.
@@ -265,13 +296,10 @@ Example JSON response:
 
     # --- Groq API call ---
     try:
-        client = Groq(
-             api_key = os.environ.get("GROQ_API_KEY", "REMOVED")
-
-        )
-        chat_completion = client.chat.completions.create(
+        # Shared client: keep-alive, deadline, retries and the circuit breaker live in llm_client.py
+        chat_completion = get_llm_client().chat(
             messages=[{"role": "user", "content": prompt}],
-            model="qwen/qwen3-32b",
+            model=GROQ_MODEL,
             temperature=0.1,
             response_format={"type": "json_object"},
         )
@@ -288,21 +316,36 @@ Example JSON response:
                 elif v == "bad": verdict_counts['bad'] += 1
             return ing_list
 
+        # Stored annotations and the ones just returned go back into the buckets in ingredient order.
+        annotated = []
+        for bucket in ("highly_contributing", "moderate_ingredients", "least_contributing"):
+            annotated.extend(analysis_data.get(bucket) or [])
+        merged = annotations.merge(ingredients_list, known, annotated, skin_type, PROMPT_VERSION)
+        highly_annotated, moderate_annotated, least_annotated = split_by_contribution(merged)
+
         final_result = {
             "overall_verdict": overall_verdict,
             "overall_explanation": analysis_data.get("overall_explanation", "Analysis complete."),
-            "highly_contributing": count_verdicts(analysis_data.get("highly_contributing", [])),
-            "moderate_ingredients": count_verdicts(analysis_data.get("moderate_ingredients", [])),
-            "least_contributing": count_verdicts(analysis_data.get("least_contributing", [])),
+            "highly_contributing": count_verdicts(highly_annotated),
+            "moderate_ingredients": count_verdicts(moderate_annotated),
+            "least_contributing": count_verdicts(least_annotated),
             "summary": verdict_counts
         }
+        cache.set(cache_key, final_result)
         return final_result
 
+    except CircuitOpenError:
+        # The LLM is failing; answer with the local verdict instead of waiting on it.
+        result = local_analysis(product_name, skin_type, overall_verdict,
+                                highly_contributing_list, moderate_ingredients_list, least_contributing_list)
+        result["explanation_status"] = EXPLANATION_UNAVAILABLE
+        return result
+
     except Exception as e:
         logging.error(f"An unexpected error occurred during Groq analysis: {e}")
         return {
             "overall_verdict": "Bad",
-            "overall_explanation": "An unexpected error occurred during analysis.",
+            "overall_explanation": ANALYSIS_ERROR_EXPLANATION,
             "highly_contributing": format_ingredients(highly_contributing_list),
             "moderate_ingredients": format_ingredients(moderate_ingredients_list),
             "least_contributing": format_ingredients(least_contributing_list),
@@ -316,6 +359,32 @@ Example JSON response:
 
 # --- Other Routes ---
 
+@app.route('/api/ingredients/refresh-index', methods=['POST'])
+def refresh_ingredients_index():
+    """Reloads the in-memory ingredient index after the ingredients table changes."""
+    conn = None
+    cur = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        index = refresh_ingredient_index(cur)
+        return jsonify({'message': 'Ingredient index refreshed', 'ingredients': len(index)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+    finally:
+        if cur: cur.close()
+        if conn: conn.close()
+
+@app.route('/api/analysis-cache/stats', methods=['GET'])
+def analysis_cache_stats():
+    """Reports hit/miss counters for the Groq analysis cache."""
+    return jsonify(get_analysis_cache().stats())
+
+@app.route('/api/annotation-cache/stats', methods=['GET'])
+def annotation_cache_stats():
+    """Reports hit/miss counters for the per-ingredient annotation store."""
+    return jsonify(get_ingredient_annotations().stats())
+
 @app.route('/register', methods=['POST'])
 def register_seller():
     conn = None
@@ -376,6 +445,221 @@ def login_seller():
         if cur: cur.close()
         if conn: conn.close()
 
+# --- Product Upload Pipeline ---
+# Uploads with mode=async return 202 as soon as the product row and images are
+# stored; ingredient resolution, the Groq call and the accepted/rejected insert
+# then run on this worker pool. UPLOAD_WORKERS sets the pool size.
+#
+# The job itself only lives in memory, so the product row carries its analysis
+# state (migrations/005_product_analysis_status.sql). A sweep re-queues products
+# whose analysis failed, or stayed pending for ANALYSIS_STALE_AFTER seconds
+# (e.g. the process restarted), up to ANALYSIS_MAX_ATTEMPTS attempts.
+upload_jobs = JobQueue(max_workers=int(os.environ.get('UPLOAD_WORKERS', 4)), name='upload')
+
+ANALYSIS_MAX_ATTEMPTS = int(os.environ.get('ANALYSIS_MAX_ATTEMPTS', 3))
+ANALYSIS_RETRY_DELAY = float(os.environ.get('ANALYSIS_RETRY_DELAY', 60))
+ANALYSIS_STALE_AFTER = float(os.environ.get('ANALYSIS_STALE_AFTER', 15 * 60))
+ANALYSIS_SWEEP_INTERVAL = float(os.environ.get('ANALYSIS_SWEEP_INTERVAL', 5 * 60))  # 0 disables the sweep
+ANALYSIS_SWEEP_BATCH = int(os.environ.get('ANALYSIS_SWEEP_BATCH', 20))
+
+def resolve_product_ingredients(ingredients, skin_type, cur):
+    db_ingredients_data = []
+    for ingredient in ingredients:
+        found_ingredient = find_ingredient_in_db(ingredient, skin_type, cur)
+        db_ingredients_data.append(found_ingredient or {
+            'ingredient_name': ingredient, 'verdict': 'Unknown',
+            'effect': 'N/A', 'side_effect': 'N/A', 'usage_notes': 'N/A'
+        })
+    return db_ingredients_data
+
+def insert_product_verdict(cur, product_id, analysis_result):
+    """Stores the analysis in accepted_products or rejected_products and returns the table used."""
+    overall_verdict = analysis_result.get('overall_verdict')
+    overall_explanation = analysis_result.get('overall_explanation')
+    highly_contributing = json.dumps(analysis_result.get('highly_contributing'))
+    moderate_ingredients = json.dumps(analysis_result.get('moderate_ingredients'))
+    least_contributing = json.dumps(analysis_result.get('least_contributing'))
+    summary = json.dumps(analysis_result.get('summary'))
+    
+    table_to_insert = "accepted_products" if overall_verdict.lower() in ['good', 'moderate'] else "rejected_products"
+    
+    cur.execute(
+        f"""
+        INSERT INTO {table_to_insert} (product_id, overall_verdict, overall_explanation, highly_contributing, moderate_ingredients, least_contributing, summary) 
+        VALUES (%s, %s, %s, %s, %s, %s, %s);
+        """,
+        (product_id, overall_verdict, overall_explanation, highly_contributing, moderate_ingredients, least_contributing, summary)
+    )
+    if table_to_insert == "accepted_products":
+        notify_product_change(cur, [product_id])  # new search suggestion
+    return table_to_insert
+
+def analyze_uploaded_product(product_id, product_name, ingredients, skin_type):
+    """Background half of an async upload: analyze the product and store its verdict."""
+    conn = None
+    cur = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
+        db_ingredients_data = resolve_product_ingredients(ingredients, skin_type, cur)
+        analysis_result = groq_analyze_skincare(product_name, db_ingredients_data, skin_type)
+
+        # Lock the product so a re-queued copy of this job cannot store a second verdict.
+        cur.execute("SELECT analysis_status FROM product WHERE product_id = %s FOR UPDATE;", (product_id,))
+        row = cur.fetchone()
+        if row is None:
+            conn.rollback()
+            return None  # deleted while it was being analyzed
+        if row['analysis_status'] is not None:
+            insert_product_verdict(cur, product_id, analysis_result)
+            cur.execute(
+                "UPDATE product SET analysis_status = NULL, analysis_error = NULL, analysis_updated_at = now() "
+                "WHERE product_id = %s;",
+                (product_id,)
+            )
+        conn.commit()
+        return analysis_result
+    except Exception as e:
+        if conn:
+            conn.rollback()
+        mark_analysis_failed(product_id, e)
+        raise
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+def mark_analysis_failed(product_id, error):
+    """Records a failed async analysis so the sweep retries it and the dashboard can show it."""
+    conn = None
+    try:
+        conn = get_db_connection()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE product
+                SET analysis_status = 'failed', analysis_error = %s, analysis_updated_at = now()
+                WHERE product_id = %s AND analysis_status IS NOT NULL;
+                """,
+                (str(error)[:1000], product_id)
+            )
+        conn.commit()
+    except Exception as e:
+        logging.error(f"Could not record failed analysis of product {product_id}: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+def requeue_unfinished_analyses():
+    """
+    Claims products whose async analysis failed or went stale and queues them again.
+    Claims bump analysis_updated_at, so other processes running the sweep skip them.
+    Every claim counts as an attempt; a stale product out of attempts is marked failed.
+    Returns the number of products queued.
+    """
+    params = {"max_attempts": ANALYSIS_MAX_ATTEMPTS, "retry_delay": ANALYSIS_RETRY_DELAY,
+              "stale_after": ANALYSIS_STALE_AFTER, "batch": ANALYSIS_SWEEP_BATCH}
+    conn = get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE product
+                SET analysis_status = 'failed', analysis_error = 'Analysis did not finish', analysis_updated_at = now()
+                WHERE analysis_status = 'pending' AND analysis_attempts >= %(max_attempts)s
+                  AND analysis_updated_at < now() - %(stale_after)s * interval '1 second';
+                """,
+                params
+            )
+            cur.execute(
+                """
+                UPDATE product
+                SET analysis_status = 'pending', analysis_attempts = analysis_attempts + 1, analysis_updated_at = now()
+                WHERE product_id IN (
+                    SELECT product_id FROM product
+                    WHERE analysis_attempts < %(max_attempts)s
+                      AND ((analysis_status = 'failed'
+                            AND analysis_updated_at < now() - %(retry_delay)s * interval '1 second')
+                        OR (analysis_status = 'pending'
+                            AND analysis_updated_at < now() - %(stale_after)s * interval '1 second'))
+                    ORDER BY analysis_updated_at
+                    LIMIT %(batch)s
+                    FOR UPDATE SKIP LOCKED
+                )
+                RETURNING product_id, seller_id, product_name, ingredients_list, skin_type;
+                """,
+                params
+            )
+            claimed = cur.fetchall()
+        conn.commit()
+    finally:
+        conn.close()
+
+    for product_id, seller_id, product_name, ingredients, skin_type in claimed:
+        upload_jobs.submit(
+            analyze_uploaded_product, product_id, product_name, ingredients or [], skin_type,
+            metadata={'product_id': product_id, 'seller_id': seller_id, 'retry': True}
+        )
+    return len(claimed)
+
+def analysis_sweep_loop():
+    """Background loop around requeue_unfinished_analyses()."""
+    while True:
+        time.sleep(ANALYSIS_SWEEP_INTERVAL)
+        try:
+            queued = requeue_unfinished_analyses()
+            if queued:
+                logging.info(f"Re-queued analysis of {queued} products.")
+        except Exception as e:
+            logging.error(f"Analysis sweep failed: {e}")
+
+if ANALYSIS_SWEEP_INTERVAL > 0:
+    threading.Thread(target=analysis_sweep_loop, name='analysis-sweep', daemon=True).start()
+
+# --- Fast Analysis Mode ---
+# With analysis=fast the upload stores the locally computed verdict and a templated
+# explanation straight away; the LLM explanation is generated on this pool and then
+# written over the stored one. EXPLANATION_WORKERS sets the pool size.
+explanation_jobs = JobQueue(max_workers=int(os.environ.get('EXPLANATION_WORKERS', 2)), name='explanation')
+
+def update_product_explanation(product_id, table, product_name, db_ingredients_data, skin_type):
+    """Background half of a fast upload: replace the templated explanation with the LLM one."""
+    analysis_result = groq_analyze_skincare(product_name, db_ingredients_data, skin_type)
+    if analysis_result.get('overall_explanation') == ANALYSIS_ERROR_EXPLANATION or analysis_result.get('explanation_status'):
+        raise RuntimeError("LLM analysis failed; the local explanation was kept.")
+
+    conn = None
+    cur = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(
+            f"""
+            UPDATE {table}
+            SET overall_explanation = %s, highly_contributing = %s, moderate_ingredients = %s,
+                least_contributing = %s, summary = %s
+            WHERE product_id = %s;
+            """,
+            (analysis_result.get('overall_explanation'),
+             json.dumps(analysis_result.get('highly_contributing')),
+             json.dumps(analysis_result.get('moderate_ingredients')),
+             json.dumps(analysis_result.get('least_contributing')),
+             json.dumps(analysis_result.get('summary')),
+             product_id)
+        )
+        conn.commit()
+        return analysis_result
+    except Exception:
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
 @app.route('/api/upload-product', methods=['POST'])
 def upload_product():
     conn = None
@@ -389,6 +673,8 @@ def upload_product():
         brand_name = request.form.get('brandName')
         skin_type = request.form.get('skinType')
         ingredients_string = request.form.get('ingredients')
+        async_mode = request.values.get('mode') == 'async'
+        fast_mode = request.values.get('analysis') == 'fast'
         # category = request.form.get('category') # <-- REMOVED
 
         # Validation check reverted to original
@@ -404,54 +690,65 @@ def upload_product():
             return jsonify({'error': 'Maximum of 5 images allowed'}), 400
 
         image_data_list = [img_file.read() for img_file in image_files]
+        # Small copies for product grids and detail views, stored next to the originals
+        thumbnail_list, medium_list = make_variants(image_data_list)
+        hash_list, thumbnail_hash_list, medium_hash_list = image_hashes(image_data_list, thumbnail_list, medium_list)
 
         conn = get_db_connection()
         cur = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
         
         ingredients = [ing.strip() for ing in ingredients_string.split(',') if ing.strip()]
         
-        db_ingredients_data = []
-        for ingredient in ingredients:
-            found_ingredient = find_ingredient_in_db(ingredient, skin_type, cur)
-            db_ingredients_data.append(found_ingredient or {
-                'ingredient_name': ingredient, 'verdict': 'Unknown',
-                'effect': 'N/A', 'side_effect': 'N/A', 'usage_notes': 'N/A'
-            })
-        
-        analysis_result = groq_analyze_skincare(product_name, db_ingredients_data, skin_type)
+        if not async_mode:
+            db_ingredients_data = resolve_product_ingredients(ingredients, skin_type, cur)
+            if fast_mode:
+                analysis_result = local_analyze_skincare(product_name, db_ingredients_data, skin_type)
+            else:
+                analysis_result = groq_analyze_skincare(product_name, db_ingredients_data, skin_type)
 
         # INSERT statement reverted to original
         cur.execute(
             """
             INSERT INTO product
-            (seller_id, product_name, description, price, product_type, brand_name, skin_type, ingredients_list, image)
-            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+            (seller_id, product_name, description, price, product_type, brand_name, skin_type, ingredients_list, image, image_thumb, image_medium,
+             image_hash, image_thumb_hash, image_medium_hash, analysis_status, analysis_attempts, analysis_updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s::bytea[], %s::bytea[], %s, %s, %s, %s, %s, now())
             RETURNING product_id
             """,
-            (seller_id, product_name, description, price, product_type, brand_name, skin_type, ingredients, image_data_list)
+            (seller_id, product_name, description, price, product_type, brand_name, skin_type, ingredients, image_data_list, thumbnail_list, medium_list,
+             hash_list, thumbnail_hash_list, medium_hash_list, 'pending' if async_mode else None, 1 if async_mode else 0)
         )
         product_id = cur.fetchone()[0]
 
-        overall_verdict = analysis_result.get('overall_verdict')
-        overall_explanation = analysis_result.get('overall_explanation')
-        highly_contributing = json.dumps(analysis_result.get('highly_contributing'))
-        moderate_ingredients = json.dumps(analysis_result.get('moderate_ingredients'))
-        least_contributing = json.dumps(analysis_result.get('least_contributing'))
-        summary = json.dumps(analysis_result.get('summary'))
-        
-        table_to_insert = "accepted_products" if overall_verdict.lower() in ['good', 'moderate'] else "rejected_products"
-        
-        cur.execute(
-            f"""
-            INSERT INTO {table_to_insert} (product_id, overall_verdict, overall_explanation, highly_contributing, moderate_ingredients, least_contributing, summary) 
-            VALUES (%s, %s, %s, %s, %s, %s, %s);
-            """,
-            (product_id, overall_verdict, overall_explanation, highly_contributing, moderate_ingredients, least_contributing, summary)
-        )
+        if async_mode:
+            # Persist the product now and hand the analysis to the worker pool.
+            conn.commit()
+            job_id = upload_jobs.submit(
+                analyze_uploaded_product, product_id, product_name, ingredients, skin_type,
+                metadata={'product_id': product_id, 'seller_id': seller_id}
+            )
+            return jsonify({
+                'message': 'Product stored, analysis queued',
+                'job_id': job_id,
+                'product_id': product_id,
+                'status_url': f'/api/upload-product/status/{job_id}',
+                'analysis_url': f'/api/upload-product/{product_id}/analysis'
+            }), 202
+
+        table_inserted = insert_product_verdict(cur, product_id, analysis_result)
         
         # No longer adding category to the response
         
         conn.commit()
+
+        if analysis_result.get('explanation_status') == EXPLANATION_PENDING:
+            # Fast mode: the verdict is final, the LLM explanation follows.
+            job_id = explanation_jobs.submit(
+                update_product_explanation, product_id, table_inserted, product_name, db_ingredients_data, skin_type,
+                metadata={'product_id': product_id, 'seller_id': seller_id}
+            )
+            analysis_result['explanation_job_id'] = job_id
+            analysis_result['explanation_url'] = f'/api/upload-product/explanation/{job_id}'
         
         return jsonify(analysis_result), 201
 
@@ -466,5 +763,52 @@ def upload_product():
         if conn:
             conn.close()
 
+@app.route('/api/upload-product/status/<job_id>', methods=['GET'])
+def upload_product_status(job_id):
+    """Polling endpoint for uploads made with mode=async."""
+    job = upload_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job), 200
+
+@app.route('/api/upload-product/<int:product_id>/analysis', methods=['GET'])
+def upload_product_analysis_state(product_id):
+    """Analysis state of a product from the database; works after restarts and on any worker."""
+    conn = None
+    try:
+        conn = get_db_connection()
+        with conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor) as cur:
+            cur.execute(
+                """
+                SELECT p.product_id, p.analysis_status, p.analysis_error, p.analysis_attempts,
+                       CASE WHEN ap.product_id IS NOT NULL THEN 'accepted'
+                            WHEN rp.product_id IS NOT NULL THEN 'rejected' END AS result
+                FROM product p
+                LEFT JOIN accepted_products ap ON ap.product_id = p.product_id
+                LEFT JOIN rejected_products rp ON rp.product_id = p.product_id
+                WHERE p.product_id = %s;
+                """,
+                (product_id,)
+            )
+            state = cur.fetchone()
+        if state is None:
+            return jsonify({'error': 'Product not found'}), 404
+        state['status'] = state.pop('analysis_status') or ('done' if state['result'] else 'unknown')
+        return jsonify(state), 200
+    except Exception as e:
+        print(f"Database error: {e}")
+        return jsonify({'error': 'Failed to read the analysis state'}), 500
+    finally:
+        if conn:
+            conn.close()
+
+@app.route('/api/upload-product/explanation/<job_id>', methods=['GET'])
+def upload_product_explanation(job_id):
+    """Polling endpoint for the LLM explanation of an upload made with analysis=fast."""
+    job = explanation_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job), 200
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -1,33 +1,165 @@
+import time
+_imports_started = time.perf_counter()
+
 from flask import Flask, request, jsonify
 from flask_cors import CORS # Import CORS to allow cross-origin requests
-import easyocr
-import numpy as np
-import cv2
-from werkzeug.utils import secure_filename
+import hashlib
+import json
 import os
+import re
+import threading
+from analysis_cache import AnalysisCache
+from ocr_engine import OCRPool, OCR_LANGUAGES, OCR_WORKERS, decode_image
+from ocr_preprocess import get_preset, preprocess
 
 # .\venv\Scripts\Activate.ps1
 app = Flask(__name__)
 CORS(app) # Enable CORS for all routes
 
-UPLOAD_FOLDER = 'uploads'
-if not os.path.exists(UPLOAD_FOLDER):
-    os.makedirs(UPLOAD_FOLDER)
-app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-
-# Initialize EasyOCR reader once when the app starts
-# Set gpu=False if you don't have a compatible GPU or want to run on CPU only
-try:
-    reader = easyocr.Reader(['en'], gpu=False) # Use 'en' for English
-    print("EasyOCR reader initialized successfully.")
-except Exception as e:
-    print(f"Error initializing EasyOCR reader: {e}")
-    print("Please ensure EasyOCR and its its dependencies (like PyTorch) are correctly installed.")
-    reader = None # Set reader to None if initialization fails
+# OCR runs in a pool of worker processes, each with its own pre-loaded EasyOCR reader
+# (see ocr_engine.py). OCR_WORKERS sets the pool size; 0 runs a single reader in-process.
+#
+# OCR_STARTUP controls when the models are loaded, so Flask can answer health checks
+# right away instead of waiting for torch and the model weights:
+#   lazy       - on the first OCR request
+#   background - in a warm-up thread started with the server (default)
+#   eager      - before the server starts listening
+# OCR requests that arrive while the models are loading wait for them.
+OCR_STARTUP = os.environ.get('OCR_STARTUP', 'background')
+if OCR_STARTUP not in ('lazy', 'background', 'eager'):
+    print(f"Unknown OCR_STARTUP '{OCR_STARTUP}', using lazy.")
+    OCR_STARTUP = 'lazy'
+
+ocr_pool = None
+ocr_pool_error = None
+_ocr_pool_lock = threading.Lock()
+
+# Cold-start cost, served by /api/ocr/startup
+startup_report = {
+    'mode': OCR_STARTUP,
+    'imports_ms': round((time.perf_counter() - _imports_started) * 1000, 2),
+    'pool_start_ms': None,     # pool creation + waiting for every worker's model
+    'workers': [],             # per-worker torch/easyocr import and model load times
+    'first_inference_ms': None,
+    'state': 'not_loaded',
+}
+
+def init_ocr_pool():
+    global ocr_pool, ocr_pool_error
+    startup_report['state'] = 'loading'
+    started = time.perf_counter()
+    try:
+        pool = OCRPool(workers=OCR_WORKERS)
+        startup_report['workers'] = pool.warm_up()
+        startup_report['pool_start_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        startup_report['state'] = 'ready'
+        ocr_pool = pool
+        print("EasyOCR reader pool initialized successfully.")
+        print(f"OCR startup report: {json.dumps(startup_report)}")
+    except Exception as e:
+        print(f"Error initializing EasyOCR reader: {e}")
+        print("Please ensure EasyOCR and its its dependencies (like PyTorch) are correctly installed.")
+        ocr_pool_error = str(e)
+        startup_report['state'] = 'failed'
+        ocr_pool = None # Set pool to None if initialization fails
+
+def get_ocr_pool():
+    """Returns the OCR pool, loading it first if this is the first use."""
+    if ocr_pool is not None or ocr_pool_error is not None:
+        return ocr_pool
+    with _ocr_pool_lock:
+        if ocr_pool is None and ocr_pool_error is None:
+            init_ocr_pool()
+    return ocr_pool
+
+def record_first_inference(ms):
+    if startup_report['first_inference_ms'] is None:
+        startup_report['first_inference_ms'] = ms
+
+@app.route('/api/ocr/health', methods=['GET'])
+def ocr_health():
+    """Liveness: the web server is up (the model may still be loading)."""
+    return jsonify({'status': 'ok'})
+
+@app.route('/api/ocr/ready', methods=['GET'])
+def ocr_ready():
+    """
+    Readiness: 200 once the OCR model is loaded, 503 while loading or if it failed.
+    In lazy mode the model only loads on the first OCR request, so not_loaded and
+    loading count as ready (that request waits for the model) and only failed is 503.
+    """
+    state = startup_report['state']
+    if OCR_STARTUP == 'lazy':
+        ready = state != 'failed'
+    else:
+        ready = state == 'ready'
+    body = {'ready': ready, 'state': state}
+    if ocr_pool_error:
+        body['error'] = ocr_pool_error
+    return jsonify(body), 200 if ready else 503
+
+@app.route('/api/ocr/startup', methods=['GET'])
+def ocr_startup_report():
+    """Startup timing breakdown: imports, model load and first-inference latency."""
+    return jsonify(startup_report)
+
+# Maximum number of images accepted by /api/ocr/batch
+OCR_BATCH_MAX = int(os.environ.get('OCR_BATCH_MAX', 10))
+
+def elapsed_ms(started):
+    return round((time.perf_counter() - started) * 1000, 2)
+
+# --- OCR Result Cache ---
+# Retries, re-uploads and shared product photos send the same label again and again.
+# Results are cached by a SHA-256 of the decoded pixels plus the preprocessing
+# settings, in a memory LRU bounded by OCR_CACHE_BYTES and an optional SQLite
+# tier (OCR_CACHE_PATH). Responses say whether they were served from cache.
+ocr_cache = AnalysisCache(
+    max_entries=int(os.environ.get('OCR_CACHE_SIZE', 10000)),
+    max_bytes=int(os.environ.get('OCR_CACHE_BYTES', 32 * 1024 * 1024)),
+    ttl=float(os.environ.get('OCR_CACHE_TTL', 7 * 24 * 60 * 60)),
+    path=os.environ.get('OCR_CACHE_PATH'),
+    table='ocr_cache',
+)
+
+def ocr_cache_key(image, preset):
+    """Content hash of the decoded image and everything that affects its OCR result."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps({
+        'shape': image.shape, 'dtype': str(image.dtype),
+        'preset': preset, 'languages': OCR_LANGUAGES,
+    }, sort_keys=True).encode('utf-8'))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+def decode_upload(data):
+    """Decodes image bytes straight from the request. Returns (image, timings)."""
+    started = time.perf_counter()
+    image = decode_image(data)  # raises ValueError for unreadable images
+    return image, {'decode': elapsed_ms(started)}
+
+def merge_ingredient_texts(texts):
+    """
+    Merges OCR text from several label photos into one comma-separated ingredient
+    string for /api/check-product, dropping repeats (case-insensitive) and
+    "Ingredients:" headings while keeping first-seen order.
+    """
+    merged = []
+    seen = set()
+    for text in texts:
+        # Same joining rule as /api/check-product: line breaks are not separators
+        for part in re.sub(r'[\n;]+', ' ', text).split(','):
+            ingredient = re.sub(r'^\s*ingredients?\s*[:.-]?\s*', '', part, flags=re.IGNORECASE).strip(' .')
+            key = ingredient.lower()
+            if ingredient and key not in seen:
+                seen.add(key)
+                merged.append(ingredient)
+    return ", ".join(merged)
 
 @app.route('/api/ocr', methods=['POST'])
 def perform_ocr_api():
-    if reader is None:
+    ocr_pool = get_ocr_pool()
+    if ocr_pool is None:
         return jsonify({'error': 'OCR engine not initialized on backend. Check server logs.'}), 500
 
     if 'image' not in request.files:
@@ -37,31 +169,138 @@ def perform_ocr_api():
     if file.filename == '':
         return jsonify({'error': 'No selected file.'}), 400
     
-    # Save the file temporarily
-    filename = secure_filename(file.filename)
-    filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-    file.save(filepath)
+    # Preprocessing preset (downscale / grayscale / deskew / crop), see ocr_preprocess.py
+    try:
+        preset_name, preset = get_preset(request.values.get('preset'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Decode straight from the request bytes; nothing is written to disk
+    try:
+        image, timings = decode_upload(file.read())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Serve repeats of the same image from the cache
+    cache_key = ocr_cache_key(image, preset)
+    cached = ocr_cache.get(cache_key)
+    if cached is not None:
+        response = jsonify({'text': cached['text'], 'preset': preset_name, 'timings': timings, 'cached': True})
+        response.headers['X-OCR-Cache'] = 'HIT'
+        return response
 
     extracted_text = ""
     try:
+        image, stage_timings = preprocess(image, preset)
+        timings.update(stage_timings)
+
         # EasyOCR processing
         # detail=0 returns only the detected text strings
-        results = reader.readtext(filepath, detail=0) 
+        started = time.perf_counter()
+        results = ocr_pool.readtext(image)
+        timings['ocr'] = elapsed_ms(started)
+        record_first_inference(timings['ocr'])
         extracted_text = "\n".join(results) # Join results with newlines
+        ocr_cache.set(cache_key, {'text': extracted_text})
         
         # Print the extracted text to the backend terminal
         print("\n--- Extracted Text from Image ---")
         print(extracted_text)
         print("---------------------------------\n")
 
-        return jsonify({'text': extracted_text})
+        # timings are per-stage milliseconds, so slow stages show up in the response
+        response = jsonify({'text': extracted_text, 'preset': preset_name, 'timings': timings, 'cached': False})
+        response.headers['X-OCR-Cache'] = 'MISS'
+        return response
     except Exception as e:
         print(f"Error during OCR processing: {e}")
         return jsonify({'error': f'Failed to process image: {str(e)}'}), 500
-    finally:
-        # Clean up the uploaded file
-        if os.path.exists(filepath):
-            os.remove(filepath)
+
+@app.route('/api/ocr/batch', methods=['POST'])
+def perform_ocr_batch_api():
+    """
+    OCR for several label photos (front, back, sides) in one request.
+    Images are sent as repeated 'images' files and run across the worker pool in parallel.
+    """
+    ocr_pool = get_ocr_pool()
+    if ocr_pool is None:
+        return jsonify({'error': 'OCR engine not initialized on backend. Check server logs.'}), 500
+
+    files = [f for f in request.files.getlist('images') if f.filename != '']
+    if not files:
+        return jsonify({'error': 'No image files provided in the request.'}), 400
+    if len(files) > OCR_BATCH_MAX:
+        return jsonify({'error': f'Maximum of {OCR_BATCH_MAX} images allowed'}), 400
+
+    try:
+        preset_name, preset = get_preset(request.values.get('preset'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Decode everything first, answer repeats from the cache, then queue the
+    # remaining images at once so the workers process them in parallel. The same
+    # file sent twice (e.g. one photo picked for two sides) is decoded and OCR'd once.
+    unique = {}  # sha256 of the uploaded bytes -> prepared image
+    uploads = []  # (filename, prepared image), in request order
+    for file in files:
+        data = file.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if digest not in unique:
+            try:
+                image, timings = decode_upload(data)
+            except ValueError as e:
+                return jsonify({'error': f'{file.filename}: {str(e)}'}), 400
+            cache_key = ocr_cache_key(image, preset)
+            unique[digest] = {'image': image, 'timings': timings,
+                              'cache_key': cache_key, 'cached': ocr_cache.get(cache_key)}
+        uploads.append((file.filename, unique[digest]))
+
+    started = time.perf_counter()
+    futures = {}
+    for item in unique.values():
+        # Different files can still decode to the same pixels; those share a cache key.
+        if item['cached'] is None and item['cache_key'] not in futures:
+            image, stage_timings = preprocess(item['image'], preset)
+            item['timings'].update(stage_timings)
+            futures[item['cache_key']] = ocr_pool.submit(image)
+
+    try:
+        for item in unique.values():
+            if item['cached'] is not None:
+                item['text'] = item['cached']['text']
+            else:
+                item['text'] = "\n".join(futures[item['cache_key']].result())
+                item['timings']['ocr_wait'] = elapsed_ms(started)
+                record_first_inference(item['timings']['ocr_wait'])
+                ocr_cache.set(item['cache_key'], {'text': item['text']})
+    except Exception as e:
+        print(f"Error during batch OCR processing: {e}")
+        return jsonify({'error': f'Failed to process images: {str(e)}'}), 500
+
+    results = [{'filename': filename, 'text': item['text'],
+                'timings': item['timings'], 'cached': item['cached'] is not None}
+               for filename, item in uploads]
+
+    response = jsonify({
+        'images': results,
+        'ingredients': merge_ingredient_texts(r['text'] for r in results),
+        'preset': preset_name,
+        'total_ms': elapsed_ms(started),
+    })
+    response.headers['X-OCR-Cache-Hits'] = f"{sum(r['cached'] for r in results)}/{len(results)}"
+    return response
+
+@app.route('/api/ocr/cache-stats', methods=['GET'])
+def ocr_cache_stats():
+    """Reports hit/miss counters and memory use of the OCR result cache."""
+    return jsonify(ocr_cache.stats())
+
+# Model loading starts at import time, so WSGI servers (gunicorn, waitress) behave
+# like "python 3_4_ocr.py" and startup_report['mode'] is always what actually happens.
+if OCR_STARTUP == 'eager':
+    get_ocr_pool()
+elif OCR_STARTUP == 'background':
+    threading.Thread(target=get_ocr_pool, name='ocr-warm-up', daemon=True).start()
 
 # This block ensures the Flask app runs only when the script is executed directly
 if __name__ == '__main__':
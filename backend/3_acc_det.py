@@ -3,22 +3,12 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import psycopg2
 from psycopg2 import sql
+from db import get_db_connection, register_pool_stats_route
+from suggestion_index import notify_product_change
 
 app = Flask(__name__)
 CORS(app)
-
-
-
-def get_db_connection():
-    """Establishes a connection to the PostgreSQL database."""
-    conn = psycopg2.connect(
-        dbname="",
-        host="",
-        user="",
-        password=""
-    )
-    return conn
-
+register_pool_stats_route(app)
 
 
 @app.route('/api/seller/<int:seller_id>', methods=['GET'])
@@ -133,6 +123,7 @@ def delete_seller_account(seller_id):
                 "DELETE FROM product WHERE seller_id = %s;",
                 (seller_id,)
             )
+            notify_product_change(cur, product_ids)
 
         # Step 3: Delete the seller record
         cur.execute("DELETE FROM seller WHERE seller_id = %s RETURNING seller_id;", (seller_id,))
@@ -1,42 +1,130 @@
 
 import base64
-from flask import Flask, jsonify, request
+import json
+import os
+import uuid
+from flask import Flask, Response, jsonify, request, stream_with_context
 import psycopg2
 from flask_cors import CORS
+from db import get_db_connection, register_pool_stats_route
+from image_variants import THUMBNAIL_SQL
+from pagination import page_response, parse_page_args
 
 app = Flask(__name__)
 CORS(app)
+register_pool_stats_route(app) # Connections come from the shared pool in db.py
 
-# --- Database Connection Setup ---
-def get_db_connection():
-    conn = psycopg2.connect(
-        host="",
-        database="",
-        user="",
-        password=""
-    )
-    return conn
+# --- Streaming Exports ---
+# ?stream=json or ?stream=ndjson streams the list instead of building it in memory.
+# Rows come from a server-side (named) cursor STREAM_ITERSIZE at a time, so peak
+# memory stays flat no matter how many products the seller has.
+STREAM_ITERSIZE = int(os.environ.get('STREAM_ITERSIZE', 200))
+STREAM_FORMATS = {'json': 'application/json', 'ndjson': 'application/x-ndjson'}
+
+def format_product_row(columns, row):
+    """Turns a result row into the JSON-ready dict returned by the list endpoints."""
+    product_dict = dict(zip(columns, row))
+    
+    # image is the first photo's thumbnail (or the original if no thumbnail exists)
+    if product_dict.get('image'):
+        product_dict['image_base64'] = base64.b64encode(product_dict['image']).decode('utf-8')
+    
+    del product_dict['image']
+    
+    for key in ['highly_contributing', 'moderate_ingredients', 'least_contributing', 'summary']:
+        if product_dict.get(key) is None:
+            product_dict[key] = {}
+    
+    return product_dict
+
+def page_query(query, seller_id, limit, after):
+    """Adds a keyset page (product_id order) to a list query, e.g. to continue from the dashboard's cursor."""
+    query = query.rstrip().rstrip(';') + "\n        AND p.product_id > %s\n        ORDER BY p.product_id\n        LIMIT %s;"
+    return query, (seller_id, after[0] if after else 0, limit + 1)
+
+def stream_products(query, seller_id, stream_format):
+    """
+    Streams the rows of `query` as a JSON array or as NDJSON.
+
+    The query runs and its first batch is fetched before the response is returned, so
+    connection and query errors propagate to the caller (and become a normal 500).
+    Once streaming has started the status is already sent: an NDJSON stream then ends
+    with an {"error": ...} record, while a JSON array is left unclosed, so the client
+    sees invalid JSON rather than a silently short list.
+    """
+    conn = get_db_connection()
+    cur = None
+    try:
+        cur = conn.cursor(name=f"seller_export_{uuid.uuid4().hex}")
+        cur.itersize = STREAM_ITERSIZE
+        cur.execute(query, (seller_id,))
+        first_batch = cur.fetchmany(STREAM_ITERSIZE)
+    except BaseException:
+        if cur:
+            cur.close()
+        conn.close()
+        raise
+
+    def close():
+        # Safe to call twice; PooledConnection.close() only returns the connection once.
+        cur.close()
+        conn.close()
+
+    def generate():
+        try:
+            if stream_format == 'json':
+                yield '['
+            # Named cursors fill in description on the first fetch, which already happened
+            columns = [desc[0] for desc in cur.description]
+            first = True
+            for rows in (first_batch, cur):
+                for row in rows:
+                    item = app.json.dumps(format_product_row(columns, row))
+                    if stream_format == 'ndjson':
+                        yield item + '\n'
+                    else:
+                        yield item if first else ',' + item
+                    first = False
+            if stream_format == 'json':
+                yield ']'
+        except (Exception, psycopg2.DatabaseError) as error:
+            # Headers are already sent, so the best we can do is log and end the stream.
+            print(f"Database error while streaming products: {error}")
+            if stream_format == 'ndjson':
+                yield json.dumps({"error": "Failed to stream products."}) + '\n'
+        finally:
+            close()
+
+    response = Response(stream_with_context(generate()), mimetype=STREAM_FORMATS[stream_format])
+    # Also release the connection if the client goes away before the body is iterated.
+    response.call_on_close(close)
+    return response
 
 
 @app.route('/api/seller/<int:seller_id>/accepted-products', methods=['GET'])
 def get_accepted_products(seller_id):
     """
     Fetches accepted products for a specific seller, now including price and skin type.
+    Pass ?stream=json or ?stream=ndjson to stream large catalogs, or ?limit=&cursor= for pages.
     """
+    stream_format = request.args.get('stream')
+    if stream_format and stream_format not in STREAM_FORMATS:
+        return jsonify({"error": "stream must be 'json' or 'ndjson'"}), 400
+    try:
+        paginated, limit, after = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     conn = None
     cur = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
-        
-        query = """
+        query = f"""
         SELECT
             p.product_id,
             p.product_name,
             p.price,
             p.skin_type,
-            p.image,
+            {THUMBNAIL_SQL} AS image,
             ap.overall_explanation,
             ap.highly_contributing,
             ap.moderate_ingredients,
@@ -50,26 +138,24 @@ def get_accepted_products(seller_id):
         WHERE
             p.seller_id = %s;
         """
-        cur.execute(query, (seller_id,))
+        if stream_format:
+            return stream_products(query, seller_id, stream_format)
+
+        params = (seller_id,)
+        if paginated:
+            query, params = page_query(query, seller_id, limit, after)
+
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(query, params)
         products = cur.fetchall()
 
         columns = [desc[0] for desc in cur.description]
         
-        product_list = []
-        for row in products:
-            product_dict = dict(zip(columns, row))
-            
-            if product_dict.get('image') and len(product_dict['image']) > 0:
-                product_dict['image_base64'] = base64.b64encode(product_dict['image'][0]).decode('utf-8')
-            
-            del product_dict['image']
-            
-            for key in ['highly_contributing', 'moderate_ingredients', 'least_contributing', 'summary']:
-                if product_dict.get(key) is None:
-                    product_dict[key] = {}
-            
-            product_list.append(product_dict)
+        product_list = [format_product_row(columns, row) for row in products]
 
+        if paginated:
+            return jsonify(page_response(product_list, limit, lambda item: [item["product_id"]]))
         return jsonify(product_list)
 
     except (Exception, psycopg2.DatabaseError) as error:
@@ -85,21 +171,27 @@ def get_accepted_products(seller_id):
 def get_rejected_products(seller_id):
     """
     Fetches rejected products for a specific seller, now including price and skin type.
+    Pass ?stream=json or ?stream=ndjson to stream large catalogs, or ?limit=&cursor= for pages.
     """
+    stream_format = request.args.get('stream')
+    if stream_format and stream_format not in STREAM_FORMATS:
+        return jsonify({"error": "stream must be 'json' or 'ndjson'"}), 400
+    try:
+        paginated, limit, after = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     conn = None
     cur = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        
         # MODIFIED QUERY: Added p.price and p.skin_type to the SELECT statement
-        query = """
+        query = f"""
         SELECT
             p.product_id,
             p.product_name,
             p.price,
             p.skin_type,
-            p.image,
+            {THUMBNAIL_SQL} AS image,
             rp.overall_explanation,
             rp.highly_contributing,
             rp.moderate_ingredients,
@@ -113,26 +205,24 @@ def get_rejected_products(seller_id):
         WHERE
             p.seller_id = %s;
         """
-        cur.execute(query, (seller_id,))
+        if stream_format:
+            return stream_products(query, seller_id, stream_format)
+
+        params = (seller_id,)
+        if paginated:
+            query, params = page_query(query, seller_id, limit, after)
+
+        conn = get_db_connection()
+        cur = conn.cursor()
+        cur.execute(query, params)
         products = cur.fetchall()
 
         columns = [desc[0] for desc in cur.description]
         
-        product_list = []
-        for row in products:
-            product_dict = dict(zip(columns, row))
-            
-            if product_dict.get('image') and len(product_dict['image']) > 0:
-                product_dict['image_base64'] = base64.b64encode(product_dict['image'][0]).decode('utf-8')
-            
-            del product_dict['image']
-            
-            for key in ['highly_contributing', 'moderate_ingredients', 'least_contributing', 'summary']:
-                if product_dict.get(key) is None:
-                    product_dict[key] = {}
-            
-            product_list.append(product_dict)
+        product_list = [format_product_row(columns, row) for row in products]
 
+        if paginated:
+            return jsonify(page_response(product_list, limit, lambda item: [item["product_id"]]))
         return jsonify(product_list)
 
     except (Exception, psycopg2.DatabaseError) as error:
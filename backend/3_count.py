@@ -1,20 +1,107 @@
 import base64
 from flask import Flask, jsonify, request
 import psycopg2
+import psycopg2.extras
 from flask_cors import CORS
+from db import get_db_connection, register_pool_stats_route
+from image_routes import product_image_urls, register_image_routes
+from pagination import DEFAULT_PAGE_SIZE, page_response, parse_page_args
+from seller_stats import get_seller_counts, get_unfinished_counts
 
 app = Flask(__name__)
 CORS(app)
+register_pool_stats_route(app) # Connections come from the shared pool in db.py
+register_image_routes(app) # /api/product/<id>/image/<n>, linked from dashboard summaries
 
-# --- Database Connection Setup ---
-def get_db_connection():
-    conn = psycopg2.connect(
-        host="",
-        database="",
-        user="",
-        password=""
-    )
-    return conn
+# --- Seller Dashboard ---
+# GET /api/seller/<id>/dashboard answers the dashboard's first paint in one round
+# trip and one SQL statement: the seller profile, product counts (from
+# seller_product_stats) and the first page of accepted and rejected products.
+# Product summaries carry a thumbnail URL instead of image bytes; their "next"
+# cursor continues on /api/seller/<id>/accepted-products (or rejected-products).
+# ?include=profile,counts,... picks sections (default: all), ?limit= the page size.
+DASHBOARD_SECTIONS = ('profile', 'counts', 'accepted', 'rejected')
+
+# One page of a seller's products from a verdict table, in product_id order like the list endpoints' pages
+DASHBOARD_PRODUCTS_CTE = """
+    {name} AS (
+        SELECT
+            p.product_id,
+            p.product_name,
+            p.price,
+            p.skin_type,
+            v.overall_verdict,
+            p.image IS NOT NULL AS has_image
+        FROM product p
+        JOIN {table} v ON v.product_id = p.product_id
+        WHERE p.seller_id = %(seller_id)s
+        ORDER BY p.product_id
+        LIMIT %(limit)s
+    )"""
+
+DASHBOARD_COLUMNS = {
+    "profile": """json_build_object(
+            'name', s.name,
+            'email', s.email,
+            'business_license_id', s.business_license_id,
+            'seller_phno', s.seller_phno::text
+        ) AS profile""",
+    "counts": """json_build_object(
+            'total_products', coalesce(st.accepted_products, 0) + coalesce(st.rejected_products, 0),
+            'accepted_products', coalesce(st.accepted_products, 0),
+            'rejected_products', coalesce(st.rejected_products, 0),
+            'pending_products', coalesce(u.pending, 0),
+            'failed_products', coalesce(u.failed, 0)
+        ) AS counts""",
+    "accepted": "(SELECT coalesce(json_agg(a ORDER BY a.product_id), '[]') FROM accepted a) AS accepted",
+    "rejected": "(SELECT coalesce(json_agg(r ORDER BY r.product_id), '[]') FROM rejected r) AS rejected",
+}
+
+
+def parse_include(args):
+    """Returns the requested dashboard sections, or all of them if include= is absent."""
+    include_arg = args.get('include')
+    if not include_arg:
+        return list(DASHBOARD_SECTIONS)
+    requested = {section.strip() for section in include_arg.split(',') if section.strip()}
+    unknown = requested - set(DASHBOARD_SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown sections: {', '.join(sorted(unknown))}")
+    return [section for section in DASHBOARD_SECTIONS if section in requested]
+
+
+def dashboard_query(sections):
+    """Builds the single CTE query for the requested sections; returns one row, or none for an unknown seller."""
+    ctes = ["s AS (SELECT seller_id, name, email, business_license_id, seller_phno FROM seller WHERE seller_id = %(seller_id)s)"]
+    if 'accepted' in sections:
+        ctes.append(DASHBOARD_PRODUCTS_CTE.format(name='accepted', table='accepted_products'))
+    if 'rejected' in sections:
+        ctes.append(DASHBOARD_PRODUCTS_CTE.format(name='rejected', table='rejected_products'))
+    if 'counts' in sections:
+        # Async uploads whose analysis is unfinished (see migrations/005_product_analysis_status.sql)
+        ctes.append("""u AS (
+        SELECT count(*) FILTER (WHERE analysis_status = 'pending') AS pending,
+               count(*) FILTER (WHERE analysis_status = 'failed') AS failed
+        FROM product
+        WHERE seller_id = %(seller_id)s AND analysis_status IS NOT NULL
+    )""")
+    columns = ["s.seller_id"] + [DASHBOARD_COLUMNS[section] for section in sections]
+    return f"""
+        WITH {", ".join(ctes)}
+        SELECT
+            {", ".join(columns)}
+        FROM s
+        LEFT JOIN seller_product_stats st ON st.seller_id = s.seller_id
+        {"CROSS JOIN u" if 'counts' in sections else ""};
+    """
+
+
+def product_summaries(rows, limit):
+    """Turns one section's rows (limit + 1 of them) into a page with thumbnail URLs."""
+    for item in rows:
+        has_image = item.pop('has_image')
+        item['thumbnail_url'] = product_image_urls(item['product_id'], 1, variant='thumb')[0] if has_image else None
+    return page_response(rows, limit, lambda item: [item["product_id"]])
 
 # --- API Endpoints ---
 
@@ -29,21 +116,20 @@ def get_product_counts(seller_id):
         conn = get_db_connection()
         cur = conn.cursor()
 
-        # Count accepted products for the seller
-        cur.execute("SELECT COUNT(*) FROM accepted_products AS ap JOIN product AS p ON ap.product_id = p.product_id WHERE p.seller_id = %s;", (seller_id,))
-        accepted_products = cur.fetchone()[0]
+        # Counts are kept per seller in seller_product_stats (see seller_stats.py)
+        accepted_products, rejected_products = get_seller_counts(cur, seller_id)
+        # Async uploads still waiting for (or failed in) analysis are not in either table yet
+        pending_products, failed_products = get_unfinished_counts(cur, seller_id)
 
-        # Count rejected products for the seller
-        cur.execute("SELECT COUNT(*) FROM rejected_products AS rp JOIN product AS p ON rp.product_id = p.product_id WHERE p.seller_id = %s;", (seller_id,))
-        rejected_products = cur.fetchone()[0]
-        
         # Calculate total products by summing approved and rejected products
         total_products = accepted_products + rejected_products
 
         return jsonify({
             "total_products": total_products,
             "accepted_products": accepted_products,
-            "rejected_products": rejected_products
+            "rejected_products": rejected_products,
+            "pending_products": pending_products,
+            "failed_products": failed_products
         })
 
     except (Exception, psycopg2.DatabaseError) as error:
@@ -56,6 +142,44 @@ def get_product_counts(seller_id):
             conn.close()
 
 
+@app.route('/api/seller/<int:seller_id>/dashboard', methods=['GET'])
+def get_seller_dashboard(seller_id):
+    """
+    Fetches everything the seller dashboard shows on load in a single query.
+    """
+    try:
+        sections = parse_include(request.args)
+        _, limit, _ = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    limit = limit or DEFAULT_PAGE_SIZE
+
+    conn = None
+    cur = None
+    try:
+        conn = get_db_connection()
+        cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+        cur.execute(dashboard_query(sections), {"seller_id": seller_id, "limit": limit + 1})
+        dashboard = cur.fetchone()
+
+        if dashboard is None:
+            return jsonify({"error": "Seller not found"}), 404
+
+        for section in ('accepted', 'rejected'):
+            if section in dashboard:
+                dashboard[section] = product_summaries(dashboard[section], limit)
+        return jsonify(dashboard)
+
+    except (Exception, psycopg2.DatabaseError) as error:
+        print(f"Database error: {error}")
+        return jsonify({"error": "Failed to retrieve the seller dashboard."}), 500
+    finally:
+        if cur:
+            cur.close()
+        if conn:
+            conn.close()
+
+
 if __name__ == '__main__':
     # *** Python backend configured to run on port 5009 ***
     app.run(port=5009, debug=True)
\ No newline at end of file
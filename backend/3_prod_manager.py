@@ -1,24 +1,18 @@
 # File: product_manager.py
 # Run on port 5014
 
-import base64
 from flask import Flask, jsonify, request
 import psycopg2
 import psycopg2.extras # Needed for dictionary cursor
 from flask_cors import CORS
+from db import get_db_connection, register_pool_stats_route
+from image_routes import product_image_urls, register_image_routes
+from suggestion_index import notify_product_change
 
 app = Flask(__name__)
 CORS(app)
-
-# --- Database Connection Setup ---
-def get_db_connection():
-    conn = psycopg2.connect(
-        host="",
-        database="",
-        user="",
-        password=""
-    )
-    return conn
+register_pool_stats_route(app) # Connections come from the shared pool in db.py
+register_image_routes(app) # /api/product/<id>/image/<n>
 
 # --- API Endpoints ---
 
@@ -35,7 +29,8 @@ def get_full_product_details(product_id):
         query = """
         SELECT
             p.product_id, p.seller_id, p.product_name, p.description, p.price,
-            p.product_type, p.brand_name, p.skin_type, p.ingredients_list, p.image,
+            p.product_type, p.brand_name, p.skin_type, p.ingredients_list,
+            array_length(p.image, 1) AS image_count,
             COALESCE(ap.overall_verdict, rp.overall_verdict) as overall_verdict,
             COALESCE(ap.overall_explanation, rp.overall_explanation) as overall_explanation,
             COALESCE(ap.highly_contributing, rp.highly_contributing) as highly_contributing,
@@ -56,9 +51,8 @@ def get_full_product_details(product_id):
 
         product_dict = dict(product)
 
-        if product_dict.get('image'):
-            product_dict['images_base64'] = [base64.b64encode(img_data).decode('utf-8') for img_data in product_dict['image']]
-        del product_dict['image']
+        # Images are served by the image endpoint; only their URLs go in the JSON
+        product_dict['image_urls'] = product_image_urls(product_id, product_dict.pop('image_count'))
 
         return jsonify(product_dict)
 
@@ -106,6 +100,7 @@ def update_product_details(product_id):
         if cur.fetchone() is None:
             return jsonify({"error": "Product not found"}), 404
 
+        notify_product_change(cur, [product_id])  # the name may have changed
         conn.commit()
         cur.close()
         return jsonify({"message": "Product updated successfully"}), 200
@@ -137,6 +132,7 @@ def delete_product(product_id):
             conn.rollback()
             return jsonify({"error": "Product not found"}), 404
         
+        notify_product_change(cur, [product_id])
         conn.commit()
         cur.close()
 
@@ -1,36 +1,65 @@
 import psycopg2
 import base64
+import json
+import os
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 import psycopg2.extras # Add this import
+import db
+from image_variants import THUMBNAIL_SQL
+from analysis_cache import AnalysisCache
+from pagination import DEFAULT_PAGE_SIZE, page_response, parse_fields, parse_page_args, select_list
+from product_filters import PRICE_BUCKETS, facet_counts, facet_query, filter_conditions, parse_filters, products_query
 
 app = Flask(__name__)
 CORS(app)
+db.register_pool_stats_route(app)
 
 def get_db_connection():
     try:
-        conn = psycopg2.connect(
-            host="",
-            database="",
-            user="",
-            password=""
-        )
-        return conn
+        # Pooled connection from db.py; conn.close() returns it to the pool
+        return db.get_db_connection()
     except psycopg2.Error as e:
         print(f"Error connecting to database: {e}")
         return None
 
+# Fields a client can ask for with ?fields=, and the SQL that produces each one
+PRODUCT_COLUMNS = {
+    "product_id": "p.product_id",
+    "product_name": "p.product_name",
+    "price": "p.price",
+    "skin_type": "p.skin_type",
+    # Grid cards only need the thumbnail, not the full-size photo
+    "image": THUMBNAIL_SQL,
+}
+
+# Facet counts by filter combination. Short-lived: a new or edited product shows up within FACET_CACHE_TTL.
+facet_cache = AnalysisCache(
+    max_entries=int(os.environ.get('FACET_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('FACET_CACHE_TTL', 30)),
+    table='facet_counts',
+)
+
 @app.route('/api/products/filter', methods=['GET'])
 def get_filtered_products():
-    skin_types_str = request.args.get('skin_types')
-    print(f"--- Received request for skin types: {skin_types_str} ---") # DEBUG
+    # Filters and facets are described in product_filters.py
+    try:
+        paginated, limit, after = parse_page_args(request.args)
+        fields = parse_fields(request.args, PRODUCT_COLUMNS)
+        filters = parse_filters(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
-    if not skin_types_str:
-        return jsonify({"error": "skin_types query parameter is required"}), 400
+    want_facets = request.args.get('facets', '').lower() in ('1', 'true', 'yes')
+    if not (filters or paginated or want_facets):
+        # Without a filter or a page size this would return the whole catalogue
+        return jsonify({"error": "At least one filter (skin_types, product_types, brands, verdicts, "
+                                 "min_price, max_price), limit or facets is required"}), 400
+    if want_facets and not paginated:
+        # Facet counts come back in the paginated envelope
+        paginated, limit = True, DEFAULT_PAGE_SIZE
 
-    skin_types_list = [st.strip() for st in skin_types_str.split(',')]
-    skin_types_tuple = tuple(skin_types_list)
-    print(f"--- Parsed skin types tuple: {skin_types_tuple} ---") # DEBUG
+    conditions, params = filter_conditions(filters)
 
     conn = get_db_connection()
     if conn is None:
@@ -40,33 +69,33 @@ def get_filtered_products():
     cursor = conn.cursor(cursor_factory=psycopg2.extras.DictCursor)
     
     products = []
+    facets = None
     try:
-        sql_query = """
-            SELECT 
-                p.product_id, p.product_name, p.price, 
-                p.skin_type, p.image[1] AS image 
-            FROM product p
-            INNER JOIN accepted_products ap ON p.product_id = ap.product_id
-            WHERE p.skin_type IN %s;
-        """
-        
-        cursor.execute(sql_query, (skin_types_tuple,))
+        cursor.execute(products_query(select_list(PRODUCT_COLUMNS, fields), conditions, keyset=bool(after)), dict(
+            params,
+            after_id=after[0] if after else None,
+            limit=limit + 1 if paginated else None,
+        ))
         fetched_products = cursor.fetchall()
 
         print(f"--- SQL query executed. Found {len(fetched_products)} products. ---") # DEBUG
 
         for row in fetched_products:
-            image_base64 = None
-            if row['image']:
-                image_base64 = base64.b64encode(row['image']).decode('utf-8')
+            product = dict(row)
+            if "image" in product:
+                product["image"] = base64.b64encode(product["image"]).decode('utf-8') if product["image"] else None
+            if "price" in product:
+                product["price"] = float(product["price"]) if product["price"] is not None else 0.0
+            products.append(product)
 
-            products.append({
-                "product_id": row['product_id'],
-                "product_name": row['product_name'],
-                "price": float(row['price']) if row['price'] is not None else 0.0,
-                "skin_type": row['skin_type'],
-                "image": image_base64,
-            })
+        if want_facets:
+            # Counts only depend on the filters, so browsing pages or repeating a filter is served from memory
+            cache_key = json.dumps(filters, sort_keys=True, default=str)
+            facets = facet_cache.get(cache_key)
+            if facets is None:
+                cursor.execute(facet_query(conditions), dict(params, price_buckets=PRICE_BUCKETS))
+                facets = facet_counts(cursor.fetchall())
+                facet_cache.set(cache_key, facets)
 
     except psycopg2.Error as e:
         print(f"!!! Database query error: {e} !!!") # DEBUG
@@ -76,7 +105,17 @@ def get_filtered_products():
         conn.close()
 
     print(f"--- Sending back {len(products)} products in response. ---") # DEBUG
-    return jsonify(products)
+    if paginated:
+        response = page_response(products, limit, lambda item: [item["product_id"]], fields)
+        if facets is not None:
+            response["facets"] = facets
+        return jsonify(response)
+    return jsonify([{k: v for k, v in item.items() if k in fields} for item in products])
+
+@app.route('/api/products/filter/cache-stats', methods=['GET'])
+def facet_cache_stats():
+    """Reports hit/miss counters for the facet count cache."""
+    return jsonify(facet_cache.stats())
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5010, debug=True)
\ No newline at end of file
@@ -1,25 +1,18 @@
 from flask import Flask, jsonify
 from flask_cors import CORS
 import psycopg2
-import base64
-import os
+from db import get_db_connection, register_pool_stats_route
+from image_routes import product_image_urls, register_image_routes
 
 app = Flask(__name__)
 CORS(app)
-
-# --- DATABASE CONNECTION ---
-# Make sure to replace 'your_password' with your actual database password
-def get_db_connection():
-    conn = psycopg2.connect(
-        host="",
-        database="",
-        user=os.environ.get('DB_USER', 'your_username'),
-        password=os.environ.get('DB_PASSWORD', 'your_password')
-    )
-    return conn
+# Database settings (DB_HOST, DB_NAME, DB_USER, DB_PASSWORD) are read by db.py
+register_pool_stats_route(app)
+register_image_routes(app) # /api/product/<id>/image/<n>
 
 @app.route('/api/product/details/<int:product_id>', methods=['GET'])
 def get_product_details(product_id):
+    conn = None
     try:
         conn = get_db_connection()
         cur = conn.cursor()
@@ -27,7 +20,8 @@ def get_product_details(product_id):
         # The query joins product, accepted_products, and seller tables.
         query = """
             SELECT
-                p.product_name, p.description, p.price, p.skin_type, p.image as images,
+                p.product_name, p.description, p.price, p.skin_type,
+                array_length(p.image, 1) AS image_count,
                 s.email as seller_email, -- <<< THIS LINE IS FIXED
                 ap.overall_verdict, ap.summary, ap.highly_contributing,
                 ap.moderate_ingredients, ap.least_contributing, ap.overall_explanation
@@ -56,12 +50,11 @@ def get_product_details(product_id):
         cur.close()
         conn.close()
 
-        # Process images: bytea[] comes as a list of bytes
-        # Encode each image to base64
-        encoded_images = []
-        if product_dict.get('images'):
-            for img_bytes in product_dict['images']:
-                encoded_images.append(base64.b64encode(img_bytes).decode('utf-8'))
+        # Images are not embedded any more: the frontend loads them from the
+        # image endpoint, which the browser can cache
+        image_count = product_dict.get('image_count')
+        image_urls = product_image_urls(product_id, image_count, variant='medium')
+        thumbnail_urls = product_image_urls(product_id, image_count, variant='thumb')
 
         # Structure the final JSON response as expected by the frontend
         response = {
@@ -70,7 +63,8 @@ def get_product_details(product_id):
             "price": float(product_dict.get('price', 0.0)),
             "skin_type": product_dict.get('skin_type'),
             "seller_email": product_dict.get('seller_email'),
-            "images": encoded_images,
+            "images": image_urls,
+            "thumbnails": thumbnail_urls,
             "analysis": {
                 "overall_verdict": product_dict.get('overall_verdict'),
                 "summary": product_dict.get('summary'),
@@ -89,6 +83,10 @@ def get_product_details(product_id):
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
         return jsonify({"error": "An internal server error occurred"}), 500
+    finally:
+        # Always hand the connection back to the pool, even on errors
+        if conn:
+            conn.close()
 
 
 if __name__ == '__main__':
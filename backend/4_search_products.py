@@ -3,26 +3,24 @@ from flask_cors import CORS
 import psycopg2
 import psycopg2.extras
 import base64
+import db
+from image_variants import THUMBNAIL_SQL
+from pagination import page_response, parse_fields, parse_page_args, select_list
+from product_search import parse_search_mode, search_params, search_query
+from suggestion_index import get_suggestion_index
 
 app = Flask(__name__)
 CORS(app)
+db.register_pool_stats_route(app)
 
-# --- IMPORTANT: UPDATE WITH YOUR DATABASE DETAILS ---
-DB_CONFIG = {
-    "dbname": "",
-    "user": "",  
-    "password": "", 
-    "host": "",
-    "port": "5432"
-}
+# --- IMPORTANT: DATABASE DETAILS ARE SET IN db.py (DB_HOST, DB_NAME, DB_USER, DB_PASSWORD, DB_PORT) ---
 
 
 def get_db_connection():
-    """Establishes a connection to the database."""
+    """Checks out a connection from the shared pool."""
     try:
-        conn = psycopg2.connect(**DB_CONFIG)
-        return conn
-    except psycopg2.OperationalError as e:
+        return db.get_db_connection()
+    except psycopg2.Error as e:
         print(f"Error connecting to the database: {e}")
         return None
 
@@ -34,6 +32,12 @@ def get_search_suggestions():
     if not search_query:
         return jsonify([])
 
+    # Answered from the in-memory index (see suggestion_index.py); SQL is the fallback.
+    try:
+        return jsonify(get_suggestion_index().search(search_query))
+    except Exception as e:
+        print(f"Suggestion index unavailable, falling back to SQL: {e}")
+
     conn = get_db_connection()
     if not conn:
         return jsonify({"error": "Database connection failed"}), 500
@@ -63,6 +67,15 @@ def get_search_suggestions():
         if conn:
             conn.close()
 
+# Fields a client can ask for with ?fields=, and the SQL that produces each one
+SEARCH_COLUMNS = {
+    "product_id": "p.product_id",
+    "product_name": "p.product_name",
+    "price": "p.price",
+    "skin_type": "p.skin_type",
+    "image": f"encode({THUMBNAIL_SQL}, 'base64')",
+}
+
 @app.route('/api/search/filter-products', methods=['GET'])
 def filter_products_by_search():
     """Filters the main product grid based on a search term."""
@@ -71,6 +84,17 @@ def filter_products_by_search():
     if not search_term:
         return jsonify([])
 
+    # Optional keyset pagination (?limit=&cursor=), projection (?fields=), see pagination.py,
+    # and ?mode=ilike|fulltext, see product_search.py
+    try:
+        # Sort key: (relevance rank, product_name, product_id); the rank is a float in fulltext mode
+        paginated, limit, after = parse_page_args(request.args, key_types=((int, float), str, int))
+        fields = parse_fields(request.args, SEARCH_COLUMNS)
+        mode = parse_search_mode(request.args)
+        params = search_params(mode, search_term, limit + 1 if paginated else None, after)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
     conn = get_db_connection()
     if not conn:
         return jsonify({"error": "Database connection failed"}), 500
@@ -78,34 +102,23 @@ def filter_products_by_search():
     try:
         with conn.cursor(cursor_factory=psycopg2.extras.DictCursor) as cur:
             # ----This code is to filter the products displayed in dropdown---
-            sql_query = """
-                SELECT
-                    p.product_id,
-                    p.product_name,
-                    p.price,
-                    p.skin_type,
-                    encode(p.image[1], 'base64') AS image
-                FROM product p
-                JOIN accepted_products ap ON p.product_id = ap.product_id
-                WHERE p.product_name ILIKE %s
-                ORDER BY
-                    CASE
-                        WHEN p.product_name ILIKE %s THEN 1 -- Exact match start has highest priority
-                        WHEN p.product_name ILIKE %s THEN 2 -- Contained anywhere has second priority
-                        ELSE 3
-                    END,
-                    p.product_name;
-            """
-            # Different patterns for relevance sorting
-            search_pattern_anywhere = f'%{search_term}%'
-            search_pattern_starts_with = f'{search_term}%'
-
-            cur.execute(sql_query, (search_pattern_anywhere, search_pattern_starts_with, search_pattern_anywhere))
+            sql_query = search_query(
+                mode,
+                select_list(SEARCH_COLUMNS, fields, always=('product_id', 'product_name')),
+                keyset=bool(after)
+            )
+            cur.execute(sql_query, params)
             products = cur.fetchall()
             
             # Convert fetched rows to a list of dictionaries
             product_list = [dict(row) for row in products]
-            return jsonify(product_list)
+            if paginated:
+                return jsonify(page_response(
+                    product_list, limit,
+                    lambda item: [item["search_rank"], item["product_name"], item["product_id"]],
+                    fields
+                ))
+            return jsonify([{k: v for k, v in item.items() if k in fields} for item in product_list])
     
     except Exception as e:
         print(f"Error during product filtering: {e}")
@@ -114,7 +127,6 @@ def filter_products_by_search():
         if conn:
             conn.close()
 
-
 if __name__ == '__main__':
     # Runs on the requested port 5004
     app.run(debug=True, port=5004)
\ No newline at end of file
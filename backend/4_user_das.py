@@ -1,64 +1,89 @@
 # user_das.py
 import psycopg2
 import base64
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_cors import CORS
+from db import get_db_connection, register_pool_stats_route
+from image_variants import THUMBNAIL_SQL
+from pagination import page_response, parse_fields, parse_page_args, select_list
 
 app = Flask(__name__)
 CORS(app)
+# Connections come from the shared pool in db.py
+register_pool_stats_route(app)
 
-# Database connection function
-def get_db_connection():
-    # Use the connection details you provided.
-    conn = psycopg2.connect(
-        host="",
-        database="",
-        user="",
-        password=""
-    )
-    return conn
+# Fields a client can ask for with ?fields=, and the SQL that produces each one
+PRODUCT_COLUMNS = {
+    "product_id": "p.product_id",
+    "product_name": "p.product_name",
+    "price": "p.price",
+    "skin_type": "p.skin_type",
+    "image": THUMBNAIL_SQL,
+}
 
 @app.route('/api/products', methods=['GET'])
 def get_products():
+    """
+    Lists accepted products. Supports keyset pagination on product_id
+    (?limit=&cursor=) and field projection (?fields=) - see pagination.py.
+    """
+    try:
+        paginated, limit, after = parse_page_args(request.args)
+        fields = parse_fields(request.args, PRODUCT_COLUMNS)
+    except ValueError as error:
+        return jsonify({"error": str(error)}), 400
+
+    conn = None
     try:
         conn = get_db_connection()
         cur = conn.cursor()
         
         # SQL query to get accepted products and their details from the product table
-        # We join on product_id and select the first image (image[1])
+        # We join on product_id and select the thumbnail of the first image,
+        # falling back to the original (image[1]) for products without variants
         # Note: PostgreSQL array indices start at 1, so it should be image[1]
-        cur.execute("""
-            SELECT p.product_id, p.product_name, p.price, p.skin_type, p.image[1] AS image
+        # The image is only read from disk when the client asked for it.
+        # One extra row is fetched to know whether there is a next page.
+        cur.execute(f"""
+            SELECT {select_list(PRODUCT_COLUMNS, fields)}
             FROM product p
-            JOIN accepted_products ap ON p.product_id = ap.product_id;
-        """)
+            JOIN accepted_products ap ON p.product_id = ap.product_id
+            WHERE %(after_id)s IS NULL OR p.product_id > %(after_id)s
+            ORDER BY p.product_id
+            LIMIT %(limit)s;
+        """, {"after_id": after[0] if after else None, "limit": limit + 1 if paginated else None})
         
+        columns = [desc[0] for desc in cur.description]
         products = cur.fetchall()
         
         # Prepare the data for JSON response
         products_list = []
         for product in products:
-            product_id, product_name, price, skin_type, image_data = product
+            product_dict = dict(zip(columns, product))
             
             # Convert binary image data to base64 string
-            image_base64 = base64.b64encode(image_data).decode('utf-8') if image_data else None
+            if "image" in product_dict:
+                image_data = product_dict["image"]
+                product_dict["image"] = base64.b64encode(image_data).decode('utf-8') if image_data else None
+            if "price" in product_dict:
+                price = product_dict["price"]
+                product_dict["price"] = str(price) if price is not None else None # Convert Decimal to string
             
-            products_list.append({
-                "product_id": product_id,
-                "product_name": product_name,
-                "price": str(price) if price is not None else None, # Convert Decimal to string
-                "skin_type": skin_type,
-                "image": image_base64
-            })
+            products_list.append(product_dict)
             
         cur.close()
-        conn.close()
         
-        return jsonify(products_list)
+        if paginated:
+            return jsonify(page_response(products_list, limit, lambda item: [item["product_id"]], fields))
+        return jsonify([{k: v for k, v in item.items() if k in fields} for item in products_list])
 
     except (Exception, psycopg2.Error) as error:
         print("Error while fetching products from PostgreSQL:", error)
         return jsonify({"error": "Failed to retrieve products."}), 500
+    finally:
+        # Always hand the connection back to the pool, even on errors
+        if conn:
+            conn.close()
 
 if __name__ == '__main__':
     # Using a port number after 5007 as requested
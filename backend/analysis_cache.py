@@ -0,0 +1,161 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# --- Cache for Groq Analysis Results ---
+# Results are keyed by a hash of everything that goes into the prompt, so a
+# repeat check of the same product skips the LLM call. There is an in-process
+# LRU tier and an optional SQLite tier that survives restarts and can be shared
+# between services. Values are stored as JSON text so callers always get a
+# fresh copy they are free to modify. The OCR service reuses the same class,
+# bounded by bytes instead of entry count, for its text results.
+
+ANALYSIS_CACHE_SIZE = int(os.environ.get('ANALYSIS_CACHE_SIZE', 512))
+ANALYSIS_CACHE_TTL = float(os.environ.get('ANALYSIS_CACHE_TTL', 24 * 60 * 60))
+ANALYSIS_CACHE_PATH = os.environ.get('ANALYSIS_CACHE_PATH')  # e.g. analysis_cache.sqlite3
+
+
+def analysis_cache_key(product_name, ingredients_list, skin_type, model, prompt_version):
+    """Builds a content hash from the normalized analysis inputs."""
+    ingredients = [
+        [
+            str(ing.get('ingredient_name') or '').strip().lower(),
+            str(ing.get('verdict') or '').strip().lower(),
+            str(ing.get('side_effect') or '').strip().lower(),
+        ]
+        for ing in ingredients_list
+    ]
+    payload = json.dumps({
+        'ingredients': ingredients,
+        'skin_type': (skin_type or '').strip().lower(),
+        'product_name': (product_name or '').strip().lower(),
+        'model': model,
+        'prompt_version': prompt_version,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class AnalysisCache:
+    """
+    LRU + optional SQLite cache with TTL eviction and hit/miss counters.
+    The memory tier is bounded by max_entries and, if given, by max_bytes of stored
+    JSON, measured as encoded UTF-8 bytes.
+    """
+
+    def __init__(self, max_entries=ANALYSIS_CACHE_SIZE, ttl=ANALYSIS_CACHE_TTL, path=None,
+                 max_bytes=None, table='analysis_cache'):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid cache table name: {table}")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.ttl = ttl
+        self.table = table
+        self.entries = OrderedDict()  # key -> (expires_at, json text)
+        self.lock = threading.Lock()
+        self.stats_counts = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'evictions': 0}
+        self.db = None
+        if path:
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute(
+                f"CREATE TABLE IF NOT EXISTS {table} "
+                "(key TEXT PRIMARY KEY, expires_at REAL NOT NULL, value TEXT NOT NULL)"
+            )
+            self.db.commit()
+
+    def _forget(self, key):
+        _, value = self.entries.pop(key)
+        self.total_bytes -= len(value.encode('utf-8'))
+
+    def _remember(self, key, expires_at, value):
+        if key in self.entries:
+            self._forget(key)
+        self.entries[key] = (expires_at, value)
+        self.total_bytes += len(value.encode('utf-8'))
+        while self.entries and (
+            len(self.entries) > self.max_entries
+            or (self.max_bytes is not None and self.total_bytes > self.max_bytes)
+        ):
+            self._forget(next(iter(self.entries)))
+            self.stats_counts['evictions'] += 1
+
+    def get(self, key):
+        """Returns a copy of the cached result, or None on a miss."""
+        now = time.time()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry and entry[0] > now:
+                self.entries.move_to_end(key)
+                self.stats_counts['hits'] += 1
+                return json.loads(entry[1])
+            if entry:
+                self._forget(key)
+
+            if self.db is not None:
+                row = self.db.execute(
+                    f"SELECT expires_at, value FROM {self.table} WHERE key = ?", (key,)
+                ).fetchone()
+                if row and row[0] > now:
+                    self._remember(key, row[0], row[1])
+                    self.stats_counts['disk_hits'] += 1
+                    return json.loads(row[1])
+                if row:
+                    self.db.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                    self.db.commit()
+
+            self.stats_counts['misses'] += 1
+            return None
+
+    def set(self, key, result):
+        value = json.dumps(result)
+        expires_at = time.time() + self.ttl
+        with self.lock:
+            self._remember(key, expires_at, value)
+            if self.db is not None:
+                try:
+                    self.db.execute(
+                        f"INSERT OR REPLACE INTO {self.table} (key, expires_at, value) VALUES (?, ?, ?)",
+                        (key, expires_at, value)
+                    )
+                    self.db.commit()
+                except sqlite3.Error as e:
+                    logging.error(f"Could not write analysis cache entry to disk: {e}")
+
+    def purge_expired(self):
+        """Drops expired entries from both tiers."""
+        now = time.time()
+        with self.lock:
+            for key in [k for k, (expires_at, _) in self.entries.items() if expires_at <= now]:
+                self._forget(key)
+            if self.db is not None:
+                self.db.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (now,))
+                self.db.commit()
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.stats_counts)
+            stats['entries'] = len(self.entries)
+            stats['bytes'] = self.total_bytes
+        lookups = stats['hits'] + stats['disk_hits'] + stats['misses']
+        stats['hit_rate'] = round((stats['hits'] + stats['disk_hits']) / lookups, 4) if lookups else 0.0
+        return stats
+
+
+# --- Shared cache instance ---
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache():
+    """Returns the process-wide cache, configured from the environment."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = AnalysisCache(path=ANALYSIS_CACHE_PATH)
+    return _cache
@@ -0,0 +1,112 @@
+import argparse
+import os
+import time
+
+import psycopg2
+
+import db
+from bench_search import seed, time_query
+from product_filters import PRICE_BUCKETS, facet_query, filter_conditions, parse_filters, products_query
+
+# --- Filter Benchmark ---
+# Times GET /api/products/filter on synthetic catalogues: the first page of products
+# and the facet count query (uncached, as on a facet_cache miss) for a few filter
+# combinations. Like bench_search.py it works in a scratch schema, dropped at the
+# end unless --keep:
+#
+#   python bench_filters.py                                 # 10k, 100k and 1M products
+#   python bench_filters.py --sizes 10000,50000 --repeat 10 --explain
+#
+# Products come from bench_search.seed(); migrations/003_product_filters.sql is
+# applied up front.
+
+BENCH_SCHEMA = 'filter_bench'
+MIGRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations', '003_product_filters.sql')
+
+SCHEMA_SQL = f"""
+    CREATE SCHEMA {BENCH_SCHEMA};
+    CREATE TABLE {BENCH_SCHEMA}.product (
+        product_id serial PRIMARY KEY,
+        seller_id integer,
+        product_name text,
+        description text,
+        price numeric(10, 2),
+        product_type text,
+        brand_name text,
+        skin_type text,
+        ingredients_list text[],
+        image bytea[],
+        image_thumb bytea[]
+    );
+    CREATE TABLE {BENCH_SCHEMA}.accepted_products (
+        product_id integer PRIMARY KEY,
+        overall_verdict text DEFAULT (ARRAY['Good', 'Moderate', 'Poor'])[1 + floor(random() * 3)::int]
+    );
+"""
+
+# (label, query-string arguments), from no filter to all of them.
+FILTER_CASES = [
+    ('no filter', {}),
+    ('skin type', {'skin_types': 'oily'}),
+    ('skin + brand', {'skin_types': 'oily,dry', 'brands': 'Cerave'}),
+    ('skin + type + verdict', {'skin_types': 'sensitive', 'product_types': 'Serum', 'verdicts': 'good'}),
+    ('all + price', {'skin_types': 'dry', 'product_types': 'Moisturizer', 'brands': 'Olay,Plum',
+                     'verdicts': 'good,moderate', 'min_price': '250', 'max_price': '1000'}),
+]
+
+
+def run_size(cur, size, repeat, page_size, explain):
+    columns = "p.product_id, p.product_name, p.price, p.skin_type"
+    print(f"\n{size:,} products")
+    print(f"  {'filters':<24} {'page rows':>10} {'ms':>9}   {'facet rows':>10} {'ms':>9}")
+    for label, args in FILTER_CASES:
+        conditions, params = filter_conditions(parse_filters(args))
+        page_sql = products_query(columns, conditions)
+        page_ms, page_rows = time_query(cur, page_sql, dict(params, limit=page_size), repeat)
+        facet_sql = facet_query(conditions)
+        facet_params = dict(params, price_buckets=PRICE_BUCKETS)
+        facet_ms, facet_rows = time_query(cur, facet_sql, facet_params, repeat)
+        print(f"  {label:<24} {page_rows:>10,} {page_ms:>9.2f}   {facet_rows:>10,} {facet_ms:>9.2f}")
+        if explain:
+            cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + facet_sql, facet_params)
+            for (line,) in cur.fetchall():
+                print(f"      {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the product filter and facet count queries.")
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help="comma-separated catalogue sizes, smallest first")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per query")
+    parser.add_argument('--page-size', type=int, default=24, help="limit for the product page queries")
+    parser.add_argument('--explain', action='store_true', help="print EXPLAIN ANALYZE for every facet query")
+    parser.add_argument('--keep', action='store_true', help=f"leave the {BENCH_SCHEMA} schema in place")
+    args = parser.parse_args()
+    sizes = sorted(int(s) for s in args.sizes.split(',') if s.strip())
+
+    conn = psycopg2.connect(**db.DB_CONFIG)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;")
+            cur.execute(SCHEMA_SQL)
+            cur.execute(f"SET search_path TO {BENCH_SCHEMA}, public;")
+            with open(MIGRATION) as f:
+                cur.execute(f.read())
+
+            loaded = 0
+            for size in sizes:
+                started = time.perf_counter()
+                seed(cur, loaded + 1, size)
+                print(f"\nLoaded products {loaded + 1:,}..{size:,} in {time.perf_counter() - started:.1f}s")
+                loaded = size
+                run_size(cur, size, args.repeat, args.page_size, args.explain)
+
+            if not args.keep:
+                cur.execute(f"DROP SCHEMA {BENCH_SCHEMA} CASCADE;")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
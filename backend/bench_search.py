@@ -0,0 +1,176 @@
+import argparse
+import os
+import statistics
+import time
+
+import psycopg2
+
+import db
+from product_search import SEARCH_MODES, search_params, search_query
+
+# --- Search Benchmark ---
+# Compares the ilike and fulltext modes of GET /api/search/filter-products on
+# synthetic catalogues. Everything happens in a scratch schema (dropped at the
+# end unless --keep), so it can point at the normal database:
+#
+#   python bench_search.py                                  # 10k, 100k and 1M products
+#   python bench_search.py --sizes 10000,50000 --repeat 10 --explain
+#
+# The catalogue grows from one size to the next, with migrations/002_product_search.sql
+# applied up front so search_vector and the indexes are maintained while rows go in.
+
+BENCH_SCHEMA = 'search_bench'
+MIGRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations', '002_product_search.sql')
+
+BRANDS = ['Cerave', 'Neutrogena', 'Olay', 'Cetaphil', 'Minimalist', 'Plum', 'Derma Co', 'Simple',
+          'Lakme', 'Nivea', 'Himalaya', 'Mamaearth', 'Aveeno', 'Bioderma', 'La Roche Posay']
+ADJECTIVES = ['Hydrating', 'Gentle', 'Brightening', 'Soothing', 'Oil Free', 'Daily', 'Intense',
+              'Calming', 'Clarifying', 'Nourishing', 'Matte', 'Radiance', 'Barrier Repair']
+PRODUCT_TYPES = ['Cleanser', 'Moisturizer', 'Serum', 'Toner', 'Sunscreen', 'Face Wash', 'Night Cream',
+                 'Gel', 'Lotion', 'Face Mask', 'Eye Cream', 'Exfoliant']
+SKIN_TYPES = ['oily', 'dry', 'normal', 'combination', 'sensitive']
+INGREDIENTS = ['water', 'glycerin', 'niacinamide', 'hyaluronic acid', 'ceramide np', 'salicylic acid',
+               'retinol', 'zinc oxide', 'titanium dioxide', 'panthenol', 'allantoin', 'squalane',
+               'tocopherol', 'aloe barbadensis leaf juice', 'fragrance', 'alcohol denat', 'dimethicone',
+               'cetearyl alcohol', 'phenoxyethanol', 'sodium hyaluronate', 'centella asiatica extract',
+               'lactic acid', 'glycolic acid', 'azelaic acid', 'benzoyl peroxide', 'shea butter']
+
+# (label, search term): whole words, a brand, an ingredient, a partial word and a miss.
+SEARCH_TERMS = [
+    ('product type', 'moisturizer'),
+    ('two words', 'gentle cleanser'),
+    ('brand', 'cetaphil'),
+    ('ingredient', 'niacinamide'),
+    ('partial word', 'moist'),
+    ('no match', 'xyzzy'),
+]
+
+SCHEMA_SQL = f"""
+    CREATE SCHEMA {BENCH_SCHEMA};
+    CREATE TABLE {BENCH_SCHEMA}.product (
+        product_id serial PRIMARY KEY,
+        seller_id integer,
+        product_name text,
+        description text,
+        price numeric(10, 2),
+        product_type text,
+        brand_name text,
+        skin_type text,
+        ingredients_list text[],
+        image bytea[],
+        image_thumb bytea[]
+    );
+    CREATE TABLE {BENCH_SCHEMA}.accepted_products (product_id integer PRIMARY KEY);
+"""
+
+SEED_SQL = """
+    INSERT INTO product (seller_id, product_name, description, price, product_type, brand_name, skin_type, ingredients_list)
+    SELECT
+        1 + g %% 500,
+        brand || ' ' || adjective || ' ' || product_type || ' ' || g,
+        'A ' || lower(adjective) || ' ' || lower(product_type) || ' for ' || skin_type || ' skin by ' || brand || '.',
+        round((99 + random() * 1900)::numeric, 2),
+        product_type,
+        brand,
+        skin_type,
+        ARRAY(SELECT (%(ingredients)s::text[])[1 + floor(random() * %(n_ingredients)s)::int]
+              FROM generate_series(1, 6 + g %% 10))
+    FROM (
+        SELECT
+            g,
+            (%(brands)s::text[])[1 + floor(random() * %(n_brands)s)::int] AS brand,
+            (%(adjectives)s::text[])[1 + floor(random() * %(n_adjectives)s)::int] AS adjective,
+            (%(product_types)s::text[])[1 + floor(random() * %(n_product_types)s)::int] AS product_type,
+            (%(skin_types)s::text[])[1 + floor(random() * %(n_skin_types)s)::int] AS skin_type
+        FROM generate_series(%(first)s, %(last)s) g
+    ) rows;
+"""
+
+
+def seed(cur, first, last):
+    """Adds products first..last; four out of five are accepted."""
+    cur.execute(SEED_SQL, {
+        "first": first, "last": last,
+        "brands": BRANDS, "n_brands": len(BRANDS),
+        "adjectives": ADJECTIVES, "n_adjectives": len(ADJECTIVES),
+        "product_types": PRODUCT_TYPES, "n_product_types": len(PRODUCT_TYPES),
+        "skin_types": SKIN_TYPES, "n_skin_types": len(SKIN_TYPES),
+        "ingredients": INGREDIENTS, "n_ingredients": len(INGREDIENTS),
+    })
+    cur.execute(
+        "INSERT INTO accepted_products (product_id) SELECT product_id FROM product "
+        "WHERE product_id > %s AND product_id %% 5 <> 0;",
+        (first - 1,)
+    )
+    cur.execute("ANALYZE product; ANALYZE accepted_products;")
+
+
+def time_query(cur, sql, params, repeat):
+    """Median wall time in ms over `repeat` runs (after one warm-up), and the row count."""
+    cur.execute(sql, params)
+    rows = len(cur.fetchall())
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        cur.execute(sql, params)
+        cur.fetchall()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), rows
+
+
+def run_size(cur, size, repeat, page_size, explain):
+    columns = "p.product_id, p.product_name, p.price, p.skin_type"
+    print(f"\n{size:,} products")
+    print(f"  {'search':<28} {'mode':<9} {'all rows':>10} {'ms':>9}   {'first page':>10} {'ms':>9}")
+    for label, term in SEARCH_TERMS:
+        for mode in SEARCH_MODES:
+            sql = search_query(mode, columns)
+            full_ms, full_rows = time_query(cur, sql, search_params(mode, term), repeat)
+            page_ms, page_rows = time_query(cur, sql, search_params(mode, term, page_size), repeat)
+            print(f"  {label + ' (' + term + ')':<28} {mode:<9} {full_rows:>10,} {full_ms:>9.2f}   "
+                  f"{page_rows:>10,} {page_ms:>9.2f}")
+            if explain:
+                cur.execute("EXPLAIN (ANALYZE, BUFFERS) " + sql, search_params(mode, term, page_size))
+                for (line,) in cur.fetchall():
+                    print(f"      {line}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark ilike vs fulltext product search.")
+    parser.add_argument('--sizes', default='10000,100000,1000000',
+                        help="comma-separated catalogue sizes, smallest first")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs per query")
+    parser.add_argument('--page-size', type=int, default=24, help="limit for the first-page queries")
+    parser.add_argument('--explain', action='store_true', help="print EXPLAIN ANALYZE for every page query")
+    parser.add_argument('--keep', action='store_true', help=f"leave the {BENCH_SCHEMA} schema in place")
+    args = parser.parse_args()
+    sizes = sorted(int(s) for s in args.sizes.split(',') if s.strip())
+
+    conn = psycopg2.connect(**db.DB_CONFIG)
+    conn.autocommit = True
+    try:
+        with conn.cursor() as cur:
+            # Created in public first, so the migration never puts it in the scratch schema.
+            cur.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm SCHEMA public;")
+            cur.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE;")
+            cur.execute(SCHEMA_SQL)
+            cur.execute(f"SET search_path TO {BENCH_SCHEMA}, public;")
+            with open(MIGRATION) as f:
+                cur.execute(f.read())
+
+            loaded = 0
+            for size in sizes:
+                started = time.perf_counter()
+                seed(cur, loaded + 1, size)
+                print(f"\nLoaded products {loaded + 1:,}..{size:,} in {time.perf_counter() - started:.1f}s")
+                loaded = size
+                run_size(cur, size, args.repeat, args.page_size, args.explain)
+
+            if not args.keep:
+                cur.execute(f"DROP SCHEMA {BENCH_SCHEMA} CASCADE;")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
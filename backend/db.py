@@ -0,0 +1,205 @@
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psycopg2
+import psycopg2.pool
+from flask import jsonify
+
+# --- Shared PostgreSQL Connection Pool ---
+# Every service gets its connections from here instead of calling
+# psycopg2.connect() per request. get_db_connection() hands out a pooled
+# connection whose close() puts it back in the pool, so existing
+# "conn.close()" cleanup code keeps working unchanged.
+
+DB_CONFIG = {
+    "host": os.environ.get('DB_HOST', ''),
+    "dbname": os.environ.get('DB_NAME', ''),
+    "user": os.environ.get('DB_USER', ''),
+    "password": os.environ.get('DB_PASSWORD', ''),
+    "port": os.environ.get('DB_PORT', '5432'),
+}
+
+# Connections opened up front; returned connections are kept open up to DB_POOL_MAX.
+DB_POOL_MIN = int(os.environ.get('DB_POOL_MIN', 1))
+DB_POOL_MAX = int(os.environ.get('DB_POOL_MAX', 10))
+# Seconds to wait for a free connection before giving up.
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+# Connections idle for longer than this are pinged before being handed out (0 = always).
+DB_POOL_PING_AFTER = float(os.environ.get('DB_POOL_PING_AFTER', 30))
+
+
+class PooledConnection:
+    """Wraps a psycopg2 connection; close() returns it to the pool instead of closing it."""
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self._conn.__exit__(exc_type, exc_value, traceback)
+
+    @property
+    def raw(self):
+        """The underlying psycopg2 connection, for APIs that need the real object."""
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._pool.release(self._conn)
+            self._conn = None
+
+
+class ConnectionPool:
+    """Thread-safe pool with bounded waiting, health checks and usage metrics."""
+
+    def __init__(self, minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX, timeout=DB_POOL_TIMEOUT,
+                 ping_after=DB_POOL_PING_AFTER, **conn_kwargs):
+        self.pool = psycopg2.pool.ThreadedConnectionPool(minconn, maxconn, **conn_kwargs)
+        # psycopg2 closes a returned connection once minconn are idle, which would make every
+        # checkout past the first reconnect under load. Keep up to maxconn idle instead.
+        self.pool.minconn = maxconn
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.ping_after = ping_after
+        # psycopg2's pool raises as soon as it is exhausted; the semaphore makes callers wait instead.
+        self.slots = threading.BoundedSemaphore(maxconn)
+        self.lock = threading.Lock()
+        self.last_used = {}  # id(conn) -> time it was returned, for open connections only
+        self.metrics = {
+            'checkouts': 0,
+            'in_use': 0,
+            'peak_in_use': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0,
+            'timeouts': 0,
+            'health_check_failures': 0,
+        }
+
+    def _healthy(self, conn):
+        if conn.closed:
+            return False
+        if time.time() - self.last_used.get(id(conn), 0) < self.ping_after:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def acquire(self):
+        started = time.monotonic()
+        if not self.slots.acquire(timeout=self.timeout):
+            with self.lock:
+                self.metrics['timeouts'] += 1
+            raise psycopg2.pool.PoolError(f"No database connection available after {self.timeout}s")
+        try:
+            conn = self.pool.getconn()
+            while not self._healthy(conn):
+                with self.lock:
+                    self.metrics['health_check_failures'] += 1
+                self.pool.putconn(conn, close=True)
+                self.last_used.pop(id(conn), None)
+                conn = self.pool.getconn()
+        except Exception:
+            self.slots.release()
+            raise
+
+        waited = time.monotonic() - started
+        with self.lock:
+            metrics = self.metrics
+            metrics['checkouts'] += 1
+            metrics['in_use'] += 1
+            metrics['peak_in_use'] = max(metrics['peak_in_use'], metrics['in_use'])
+            metrics['total_wait_seconds'] += waited
+            metrics['max_wait_seconds'] = max(metrics['max_wait_seconds'], waited)
+        return conn
+
+    def release(self, conn):
+        try:
+            # putconn() rolls back any open transaction before the connection is reused.
+            self.pool.putconn(conn, close=bool(conn.closed))
+            if conn.closed:
+                # A new connection may get the same id(); it must not inherit this timestamp.
+                self.last_used.pop(id(conn), None)
+            else:
+                self.last_used[id(conn)] = time.time()
+        finally:
+            with self.lock:
+                self.metrics['in_use'] -= 1
+            self.slots.release()
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.metrics)
+        stats['min_size'] = self.minconn
+        stats['max_size'] = self.maxconn
+        stats['utilization'] = round(stats['in_use'] / self.maxconn, 4)
+        stats['avg_wait_seconds'] = (
+            round(stats['total_wait_seconds'] / stats['checkouts'], 6) if stats['checkouts'] else 0.0
+        )
+        return stats
+
+
+# --- Shared pool instance ---
+# Created on first use so a service can start even while the database is down.
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(**DB_CONFIG)
+    return _pool
+
+
+def get_db_connection():
+    """Checks a connection out of the shared pool. Call close() to return it."""
+    pool = get_pool()
+    return PooledConnection(pool, pool.acquire())
+
+
+@contextmanager
+def db_cursor(cursor_factory=None, commit=False):
+    """
+    Yields a cursor on a pooled connection.
+    Commits on success if commit=True, rolls back on error, and always returns the connection.
+    """
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor(cursor_factory=cursor_factory)
+        try:
+            yield cur
+            if commit:
+                conn.commit()
+        finally:
+            cur.close()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def register_pool_stats_route(app):
+    """Adds GET /api/db/pool-stats to a service for pool wait-time and utilization metrics."""
+    @app.route('/api/db/pool-stats', methods=['GET'])
+    def db_pool_stats():
+        if _pool is None:
+            return jsonify({'initialized': False})
+        return jsonify({'initialized': True, **_pool.stats()})
+    return app
@@ -0,0 +1,109 @@
+import importlib.util
+import logging
+import os
+import sys
+
+from flask import Blueprint, Flask, jsonify
+from flask_cors import CORS
+
+# --- Unified API Gateway ---
+# Every service file in this folder is its own Flask app on its own port. This
+# module loads them all into one process and mounts each one's routes as a
+# blueprint, so the whole API is served from one port by one production server:
+#
+#   python gateway.py                                  # waitress, GATEWAY_THREADS threads
+#   gunicorn -c gunicorn.conf.py gateway:app           # one process x GATEWAY_THREADS (see gunicorn.conf.py)
+#
+# The service files still run on their own (python 1_3_acc.py) as before.
+# GATEWAY_SERVICES limits which services are mounted (e.g. "ocr" for a separate
+# OCR deployment). EasyOCR is only loaded by a worker on its first OCR request.
+
+GATEWAY_HOST = os.environ.get('GATEWAY_HOST', '0.0.0.0')
+GATEWAY_PORT = int(os.environ.get('GATEWAY_PORT', 8000))
+GATEWAY_THREADS = int(os.environ.get('GATEWAY_THREADS', 8))
+
+# Blueprint name -> service file, with the port each service uses on its own.
+SERVICES = {
+    'accounts': '1_3_acc.py',                     # 5000
+    'ocr': '3_4_ocr.py',                          # 5001
+    'seller_products': '3_acc_rej.py',            # 5002
+    'seller_details': '3_acc_det.py',             # 5003
+    'search': '4_search_products.py',             # 5004
+    'user_dashboard': '4_user_das.py',            # 5008
+    'counts': '3_count.py',                       # 5009
+    'filters': '4_filter_api.py',                 # 5010
+    'product_details': '4_product_detail_service.py',  # 5011
+    'check_product': '4_check_product_service.py',     # 5012
+    'product_manager': '3_prod_manager.py',       # 5014
+}
+
+# The OCR service loads models lazily in the gateway, never at import time.
+os.environ.setdefault('OCR_STARTUP', 'lazy')
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def load_service(name, filename):
+    """Imports a service file (their names are not valid module names) and returns the module."""
+    module_name = f"dermdoc_{name}"
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(BACKEND_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def service_blueprint(name, service_app, mounted):
+    """
+    Copies a service app's routes into a blueprint. Routes already mounted by an
+    earlier service (the shared /api/db/pool-stats, cache stats, ...) are skipped,
+    since every service in this process shares the same pools and caches.
+    """
+    blueprint = Blueprint(name, service_app.import_name)
+    for rule in service_app.url_map.iter_rules():
+        if rule.endpoint == 'static':
+            continue
+        methods = sorted(rule.methods - {'HEAD', 'OPTIONS'})
+        taken = [m for m in methods if (rule.rule, m) in mounted]
+        if taken:
+            logging.info(f"Gateway: {rule.rule} {taken} already mounted by {mounted[(rule.rule, taken[0])]}, skipping {name}.")
+            continue
+        for method in methods:
+            mounted[(rule.rule, method)] = name
+        blueprint.add_url_rule(rule.rule, endpoint=rule.endpoint, view_func=service_app.view_functions[rule.endpoint],
+                               methods=methods, defaults=rule.defaults or {})
+    return blueprint
+
+
+def create_app(services=None):
+    names = services or [s.strip() for s in os.environ.get('GATEWAY_SERVICES', ','.join(SERVICES)).split(',') if s.strip()]
+    unknown = set(names) - set(SERVICES)
+    if unknown:
+        raise ValueError(f"Unknown services: {', '.join(sorted(unknown))}. Choose from: {', '.join(SERVICES)}")
+
+    app = Flask(__name__)
+    CORS(app) # Enable CORS for all routes
+    mounted = {}
+    for name in names:
+        module = load_service(name, SERVICES[name])
+        app.register_blueprint(service_blueprint(name, module.app, mounted))
+
+    @app.route('/api/gateway/health', methods=['GET'])
+    def gateway_health():
+        return jsonify({'status': 'ok', 'services': names})
+
+    return app
+
+
+app = create_app()
+
+if __name__ == '__main__':
+    try:
+        from waitress import serve
+    except ImportError:
+        print("waitress is not installed (pip install waitress); use gunicorn -c gunicorn.conf.py gateway:app instead.")
+        sys.exit(1)
+    print(f"Serving {len(list(app.url_map.iter_rules()))} routes on {GATEWAY_HOST}:{GATEWAY_PORT} with {GATEWAY_THREADS} threads.")
+    serve(app, host=GATEWAY_HOST, port=GATEWAY_PORT, threads=GATEWAY_THREADS)
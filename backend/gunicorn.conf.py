@@ -0,0 +1,21 @@
+import os
+
+# Gunicorn settings for the unified gateway:  gunicorn -c gunicorn.conf.py gateway:app
+# Each worker is a separate process with its own DB pool, caches and (on first
+# use) its own EasyOCR pool, so keep OCR_WORKERS small when GATEWAY_WORKERS > 1.
+#
+# Background jobs (upload analysis, explanations) and the LLM request coalescer
+# live in the memory of the worker that created them, so polling
+# /api/upload-product/status/<id> or the explanation endpoints only works when
+# the poll reaches that same worker. Scale one worker with GATEWAY_THREADS; only
+# raise GATEWAY_WORKERS behind a proxy that pins each client to one worker.
+
+bind = f"{os.environ.get('GATEWAY_HOST', '0.0.0.0')}:{os.environ.get('GATEWAY_PORT', 8000)}"
+workers = int(os.environ.get('GATEWAY_WORKERS', 1))
+threads = int(os.environ.get('GATEWAY_THREADS', 8))
+worker_class = 'gthread'
+# LLM calls and streamed responses can take a while.
+timeout = int(os.environ.get('GATEWAY_TIMEOUT', 120))
+keepalive = int(os.environ.get('GATEWAY_KEEPALIVE', 5))
+# Not preloaded: every worker imports the app itself, so nothing heavy is shared across a fork.
+preload_app = False
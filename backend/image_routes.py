@@ -0,0 +1,122 @@
+import io
+import os
+
+import psycopg2
+from flask import current_app, jsonify, request, send_file, url_for
+
+from db import get_db_connection
+
+# --- Product Image Endpoint ---
+# Serves one product photo as raw bytes instead of base64 inside JSON, so the
+# browser can cache it. Responses carry a strong ETag (SHA-256 of the bytes, stored
+# at upload time; see migrations/006_image_hashes.sql), answer If-None-Match with
+# 304 without reading the image, and support Range requests.
+#
+#   GET /api/product/<product_id>/image/<n>?variant=original|medium|thumb
+#
+# n is the 0-based position of the photo, matching the order it was uploaded in.
+
+IMAGE_MAX_AGE = int(os.environ.get('IMAGE_MAX_AGE', 24 * 60 * 60))
+
+# Column holding each variant; thumb/medium fall back to the original if missing.
+IMAGE_VARIANTS = {
+    'original': "image[%(n)s]",
+    'medium': "COALESCE(image_medium[%(n)s], image[%(n)s])",
+    'thumb': "COALESCE(image_thumb[%(n)s], image[%(n)s])",
+}
+
+# Stored hash of what each variant serves (the fallback included).
+IMAGE_HASH_COLUMNS = {
+    'original': "image_hash",
+    'medium': "image_medium_hash",
+    'thumb': "image_thumb_hash",
+}
+
+
+def guess_image_mimetype(data):
+    """Detects the image type from its magic bytes."""
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return 'image/gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return 'application/octet-stream'
+
+
+def image_endpoint():
+    """The image route's endpoint name; blueprint-qualified when mounted in gateway.py."""
+    if 'get_product_image' in current_app.view_functions:
+        return 'get_product_image'
+    return next(e for e in current_app.view_functions if e.endswith('.get_product_image'))
+
+
+def product_image_urls(product_id, image_count, variant='original'):
+    """Absolute URLs for every photo of a product, for use in JSON responses."""
+    endpoint = image_endpoint()
+    return [
+        url_for(endpoint, product_id=product_id, n=n, variant=variant, _external=True)
+        for n in range(image_count or 0)
+    ]
+
+
+def register_image_routes(app):
+    @app.route('/api/product/<int:product_id>/image/<int:n>', methods=['GET'])
+    def get_product_image(product_id, n):
+        """Streams a single product image with ETag, 304 and Range support."""
+        variant = request.args.get('variant', 'original')
+        if variant not in IMAGE_VARIANTS:
+            return jsonify({"error": f"Unknown variant '{variant}'"}), 400
+
+        column = IMAGE_VARIANTS[variant]
+        hash_column = IMAGE_HASH_COLUMNS[variant]
+        params = {'n': n + 1, 'product_id': product_id}  # PostgreSQL arrays are 1-based
+        conn = None
+        cur = None
+        try:
+            conn = get_db_connection()
+            cur = conn.cursor()
+
+            # Only the stored hash is read, so a cached image is never loaded. Rows
+            # written before the hash columns existed are hashed in the database.
+            cur.execute(
+                f"""SELECT CASE WHEN {hash_column} IS NULL THEN encode(sha256({column}), 'hex')
+                                ELSE {hash_column}[%(n)s] END
+                    FROM product WHERE product_id = %(product_id)s""",
+                params
+            )
+            row = cur.fetchone()
+            if not row or row[0] is None:
+                return jsonify({"error": "Image not found"}), 404
+            etag = row[0]
+            if etag in request.if_none_match:
+                response = current_app.response_class(status=304)
+                response.set_etag(etag)
+                response.cache_control.max_age = IMAGE_MAX_AGE
+                return response
+
+            cur.execute(f"SELECT {column} FROM product WHERE product_id = %(product_id)s", params)
+            row = cur.fetchone()
+            if not row or row[0] is None:
+                return jsonify({"error": "Image not found"}), 404
+            data = bytes(row[0])
+        except (Exception, psycopg2.DatabaseError) as error:
+            print(f"Database error: {error}")
+            return jsonify({"error": "Internal server error"}), 500
+        finally:
+            if cur:
+                cur.close()
+            if conn:
+                conn.close()
+
+        # send_file handles Range requests and If-None-Match for us.
+        return send_file(
+            io.BytesIO(data),
+            mimetype=guess_image_mimetype(data),
+            etag=etag,
+            conditional=True,
+            max_age=IMAGE_MAX_AGE,
+        )
+    return app
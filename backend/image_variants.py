@@ -0,0 +1,118 @@
+import hashlib
+import logging
+import os
+import sys
+
+# --- Image Variants (thumbnail / medium) ---
+# Uploaded photos are stored at full resolution in product.image. At upload
+# time we also build a small thumbnail for product grids and a medium variant
+# for detail views, stored in product.image_thumb and product.image_medium
+# (see migrations/001_image_variants.sql). List endpoints read the thumbnail
+# and fall back to the original for rows that have no variants yet.
+# The SHA-256 of what each variant serves is stored alongside (image_hash,
+# image_thumb_hash, image_medium_hash; migrations/006_image_hashes.sql) and used
+# as the image endpoint's ETag, so checking a cached photo never reads the bytes.
+
+try:
+    import cv2
+    import numpy as np
+except ImportError:  # OpenCV is optional for the non-OCR services
+    cv2 = None
+    np = None
+    logging.warning("OpenCV not installed; image variants will not be generated.")
+
+THUMBNAIL_EDGE = int(os.environ.get('THUMBNAIL_EDGE', 320))
+MEDIUM_EDGE = int(os.environ.get('MEDIUM_EDGE', 1024))
+THUMBNAIL_QUALITY = int(os.environ.get('THUMBNAIL_QUALITY', 75))
+MEDIUM_QUALITY = int(os.environ.get('MEDIUM_QUALITY', 85))
+
+# SQL for "first image, thumbnail if available", used by the list endpoints.
+THUMBNAIL_SQL = "COALESCE(p.image_thumb[1], p.image[1])"
+
+
+def make_variant(image_bytes, long_edge, quality):
+    """
+    Returns JPEG bytes of the image scaled so its longest side is at most long_edge,
+    or None if the image cannot be decoded.
+    """
+    if cv2 is None or not image_bytes:
+        return None
+    try:
+        image = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+        if image is None:
+            return None
+        height, width = image.shape[:2]
+        scale = long_edge / max(height, width)
+        if scale < 1:
+            image = cv2.resize(image, (max(1, round(width * scale)), max(1, round(height * scale))),
+                               interpolation=cv2.INTER_AREA)
+        ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        return encoded.tobytes() if ok else None
+    except Exception as e:
+        logging.error(f"Could not build image variant: {e}")
+        return None
+
+
+def make_variants(image_data_list):
+    """Builds (thumbnails, mediums) lists aligned with the original images."""
+    thumbnails = [make_variant(img, THUMBNAIL_EDGE, THUMBNAIL_QUALITY) for img in image_data_list]
+    mediums = [make_variant(img, MEDIUM_EDGE, MEDIUM_QUALITY) for img in image_data_list]
+    return thumbnails, mediums
+
+
+def image_hashes(image_data_list, thumbnails, mediums):
+    """
+    Hex SHA-256 lists (originals, thumbnails, mediums) aligned with the originals.
+    A missing variant is served as the original, so it gets the original's hash.
+    """
+    def sha256(data):
+        return hashlib.sha256(data).hexdigest()
+    hashes = [sha256(img) for img in image_data_list]
+    thumb_hashes = [sha256(thumb) if thumb else h for thumb, h in zip(thumbnails, hashes)]
+    medium_hashes = [sha256(medium) if medium else h for medium, h in zip(mediums, hashes)]
+    return hashes, thumb_hashes, medium_hashes
+
+
+def backfill_variants(conn, batch_size=50):
+    """Generates variants for existing products that do not have them yet."""
+    updated = 0
+    while True:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT product_id, image FROM product WHERE image_thumb IS NULL AND image IS NOT NULL "
+            "ORDER BY product_id LIMIT %s",
+            (batch_size,)
+        )
+        rows = cur.fetchall()
+        if not rows:
+            cur.close()
+            return updated
+        for product_id, images in rows:
+            originals = [bytes(img) for img in images]
+            thumbnails, mediums = make_variants(originals)
+            hashes, thumb_hashes, medium_hashes = image_hashes(originals, thumbnails, mediums)
+            cur.execute(
+                "UPDATE product SET image_thumb = %s::bytea[], image_medium = %s::bytea[], "
+                "image_hash = %s, image_thumb_hash = %s, image_medium_hash = %s WHERE product_id = %s",
+                (thumbnails, mediums, hashes, thumb_hashes, medium_hashes, product_id)
+            )
+        conn.commit()
+        cur.close()
+        updated += len(rows)
+        print(f"Backfilled image variants for {updated} products...")
+
+
+if __name__ == '__main__':
+    # Usage: python image_variants.py --backfill
+    if '--backfill' not in sys.argv:
+        print("Usage: python image_variants.py --backfill")
+        sys.exit(1)
+    if cv2 is None:
+        print("OpenCV is required to build image variants.")
+        sys.exit(1)
+    from db import get_db_connection
+    conn = get_db_connection()
+    try:
+        print(f"Done. {backfill_variants(conn)} products updated.")
+    finally:
+        conn.close()
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import threading
+
+from analysis_cache import AnalysisCache
+from local_verdict import classify_ingredient
+
+# --- Per-Ingredient Annotation Store ---
+# The LLM returns a verdict and side effects for every ingredient it is shown, and
+# common ones (water, glycerin, fragrance...) come back identical on every call.
+# Each annotation is stored per ingredient, skin type and database entry as a side
+# effect of an analysis. Later prompts only list the ingredients that have no stored
+# annotation, and the stored ones are merged back into the result buckets.
+# ANNOTATION_CACHE_PATH keeps them in SQLite across restarts and between services.
+
+ANNOTATION_CACHE_SIZE = int(os.environ.get('ANNOTATION_CACHE_SIZE', 50000))
+ANNOTATION_CACHE_TTL = float(os.environ.get('ANNOTATION_CACHE_TTL', 30 * 24 * 60 * 60))
+ANNOTATION_CACHE_PATH = os.environ.get('ANNOTATION_CACHE_PATH')  # e.g. ingredient_annotations.sqlite3
+
+
+def annotation_key(ing, skin_type, prompt_version):
+    """
+    Hash of an ingredient as it appears in the prompt. The stored verdict and side
+    effect are part of it, so editing the ingredients table invalidates the annotation.
+    """
+    payload = json.dumps([
+        str(ing.get('ingredient_name') or '').strip().lower(),
+        str(ing.get('verdict') or '').strip().lower(),
+        str(ing.get('side_effect') or '').strip().lower(),
+        (skin_type or '').strip().lower(),
+        prompt_version,
+    ])
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class IngredientAnnotations:
+    def __init__(self, cache):
+        self.cache = cache
+
+    def lookup(self, ingredients_list, skin_type, prompt_version):
+        """Returns a list aligned with ingredients_list: the stored annotation, or None if unseen."""
+        return [self.cache.get(annotation_key(ing, skin_type, prompt_version)) for ing in ingredients_list]
+
+    def merge(self, ingredients_list, known, annotated, skin_type, prompt_version):
+        """
+        Combines stored annotations (`known`, from lookup()) with the ones the LLM just
+        returned (`annotated`, any order) into one list aligned with ingredients_list.
+        New annotations are stored; ingredients the LLM skipped get a local classification.
+        """
+        returned = {}
+        for item in annotated:
+            if isinstance(item, dict) and item.get('ingredient_name'):
+                returned.setdefault(str(item['ingredient_name']).strip().lower(), item)
+
+        merged = []
+        for ing, annotation in zip(ingredients_list, known):
+            if annotation is None:
+                annotation = returned.get(str(ing.get('ingredient_name') or '').strip().lower())
+                if annotation is not None:
+                    annotation = {
+                        'ingredient_name': ing.get('ingredient_name'),
+                        'verdict': annotation.get('verdict', 'Unknown'),
+                        'side_effects': annotation.get('side_effects', 'N/A'),
+                    }
+                    self.cache.set(annotation_key(ing, skin_type, prompt_version), annotation)
+                else:
+                    annotation = classify_ingredient(ing)
+            merged.append(annotation)
+        return merged
+
+    def stats(self):
+        return self.cache.stats()
+
+
+# --- Shared store instance ---
+_annotations = None
+_annotations_lock = threading.Lock()
+
+
+def get_ingredient_annotations():
+    """Returns the process-wide annotation store, configured from the environment."""
+    global _annotations
+    if _annotations is None:
+        with _annotations_lock:
+            if _annotations is None:
+                _annotations = IngredientAnnotations(AnalysisCache(
+                    max_entries=ANNOTATION_CACHE_SIZE,
+                    ttl=ANNOTATION_CACHE_TTL,
+                    path=ANNOTATION_CACHE_PATH,
+                    table='ingredient_annotations',
+                ))
+    return _annotations
@@ -0,0 +1,203 @@
+import re
+import threading
+import time
+import logging
+
+# --- In-memory Ingredient Index ---
+# The ingredients table is small and read-mostly, so instead of running the
+# exact / ILIKE / skin-type / trigram fallback cascade as separate queries for
+# every ingredient, we load the table once and resolve the same priority order
+# in Python. Rows are addressed by their position in the loaded list, and sets
+# of rows are stored as Python ints used as bitmaps.
+
+# Skin types that are tried (in this order) after the user's own skin type.
+FALLBACK_SKIN_TYPES = ['all', 'general']
+
+# Characters stripped by the "flexible" match (same as the nested REPLACE in SQL).
+NORMALIZE_PATTERN = re.compile(r'[-\s._]')
+
+
+def normalize_name(name):
+    """Lowercases a name and removes spaces, hyphens, dots and underscores."""
+    return NORMALIZE_PATTERN.sub('', name.lower())
+
+
+def substring_trigrams(text):
+    """Raw character trigrams, used to narrow down substring (ILIKE) candidates."""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def similarity_trigrams(text):
+    """Word trigrams built the same way pg_trgm builds them for similarity()."""
+    trigrams = set()
+    for word in re.findall(r'[a-z0-9]+', text.lower()):
+        padded = f'  {word} '
+        trigrams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return trigrams
+
+
+def lowest_row(mask):
+    """Returns the index of the lowest set bit of a bitmap, or None if empty."""
+    if not mask:
+        return None
+    return (mask & -mask).bit_length() - 1
+
+
+class IngredientIndex:
+    """
+    Hash maps and bitmaps over the ingredients table.
+    lookup() mirrors the priority order of find_ingredient_in_db().
+    """
+
+    def __init__(self, rows):
+        self.rows = [dict(row) for row in rows]
+        self.names = [(row.get('ingredient_name') or '').lower() for row in self.rows]
+        self.all_rows = (1 << len(self.rows)) - 1
+
+        self.exact = {}
+        self.normalized = {}
+        self.skin_types = {}
+        self.substring_postings = {}
+        self.similarity_postings = {}
+        self.similarity_sets = []
+
+        for position, name in enumerate(self.names):
+            bit = 1 << position
+            self.exact[name] = self.exact.get(name, 0) | bit
+            normalized = normalize_name(name)
+            self.normalized[normalized] = self.normalized.get(normalized, 0) | bit
+
+            for skin_type in self.rows[position].get('skin_type') or []:
+                self.skin_types[skin_type] = self.skin_types.get(skin_type, 0) | bit
+
+            for trigram in substring_trigrams(name):
+                self.substring_postings[trigram] = self.substring_postings.get(trigram, 0) | bit
+
+            trigrams = similarity_trigrams(name)
+            self.similarity_sets.append(trigrams)
+            for trigram in trigrams:
+                self.similarity_postings[trigram] = self.similarity_postings.get(trigram, 0) | bit
+
+        self.loaded_at = time.time()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def _substring_mask(self, ing_lower):
+        """Bitmap of rows whose name contains ing_lower (the ILIKE '%...%' match)."""
+        if not ing_lower:
+            return self.all_rows
+        candidates = self.all_rows
+        for trigram in substring_trigrams(ing_lower):
+            candidates &= self.substring_postings.get(trigram, 0)
+            if not candidates:
+                return 0
+        mask = 0
+        while candidates:
+            position = lowest_row(candidates)
+            candidates &= candidates - 1
+            if ing_lower in self.names[position]:
+                mask |= 1 << position
+        return mask
+
+    def _row(self, position):
+        # Callers mutate the returned dict, so always hand out a copy.
+        return dict(self.rows[position])
+
+    def _best_similarity(self, ing_lower):
+        """Closest row by trigram similarity, like ORDER BY name <-> %s LIMIT 1."""
+        query = similarity_trigrams(ing_lower)
+        candidates = 0
+        for trigram in query:
+            candidates |= self.similarity_postings.get(trigram, 0)
+
+        best_position, best_score = None, 0.0
+        while candidates:
+            position = lowest_row(candidates)
+            candidates &= candidates - 1
+            trigrams = self.similarity_sets[position]
+            score = len(query & trigrams) / len(query | trigrams)
+            if score > best_score:
+                best_position, best_score = position, score
+        return best_position, best_score
+
+    def lookup(self, ingredient_name, skin_type):
+        """
+        Resolves an ingredient using the same fallback order as the SQL cascade.
+        Returns a dict for the matching row, or None if nothing matched.
+        """
+        ing_lower = ingredient_name.lower()
+        skin_type_lower = (skin_type or '').lower()
+        exact_mask = self.exact.get(ing_lower, 0)
+        substring_mask = self._substring_mask(ing_lower)
+
+        # Exact, then partial match for the user's skin type, then 'all', then 'general'.
+        for skin in [skin_type_lower] + FALLBACK_SKIN_TYPES:
+            skin_mask = self.skin_types.get(skin, 0)
+            for match_mask in (exact_mask, substring_mask):
+                position = lowest_row(match_mask & skin_mask)
+                if position is not None:
+                    return self._row(position)
+
+        # Exact, then partial match ignoring skin type completely.
+        for match_mask in (exact_mask, substring_mask):
+            position = lowest_row(match_mask)
+            if position is not None:
+                return self._row(position)
+
+        # Closest trigram match.
+        position, score = self._best_similarity(ing_lower)
+        if position is not None:
+            result = self._row(position)
+            result['score'] = score
+            return result
+
+        # Flexible match ignoring spaces, hyphens, dots and underscores.
+        position = lowest_row(self.normalized.get(normalize_name(ing_lower), 0))
+        if position is not None:
+            return self._row(position)
+
+        return None
+
+
+# --- Shared index instance ---
+_index = None
+_index_lock = threading.Lock()
+
+
+def load_ingredient_index(cur):
+    """Builds a fresh index from the ingredients table using the given cursor."""
+    cur.execute("SELECT * FROM ingredients")
+    columns = [desc[0] for desc in cur.description]
+    rows = [dict(zip(columns, row)) for row in cur.fetchall()]
+    return IngredientIndex(rows)
+
+
+def get_ingredient_index(cur, max_age=None):
+    """
+    Returns the shared index, building it on first use.
+    If max_age (seconds) is given, an older index is rebuilt.
+    """
+    global _index
+    index = _index
+    if index is not None and (max_age is None or time.time() - index.loaded_at < max_age):
+        return index
+    with _index_lock:
+        index = _index
+        if index is None or (max_age is not None and time.time() - index.loaded_at >= max_age):
+            index = load_ingredient_index(cur)
+            _index = index
+            logging.info(f"Ingredient index loaded with {len(index)} ingredients.")
+    return index
+
+
+def refresh_ingredient_index(cur=None):
+    """
+    Refresh hook for when the ingredients table changes.
+    With a cursor the index is rebuilt right away, otherwise it is dropped
+    and rebuilt on the next lookup.
+    """
+    global _index
+    with _index_lock:
+        _index = load_ingredient_index(cur) if cur is not None else None
+    return _index
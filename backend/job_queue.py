@@ -0,0 +1,66 @@
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Background Job Queue ---
+# A small in-process job runner: work is handed to a thread pool and its
+# status is kept in memory so clients can poll for it by job ID.
+
+JOB_WORKERS = int(os.environ.get('JOB_WORKERS', 4))
+# Finished jobs are forgotten after this many seconds.
+JOB_RETENTION = float(os.environ.get('JOB_RETENTION', 60 * 60))
+
+
+class JobQueue:
+    def __init__(self, max_workers=JOB_WORKERS, retention=JOB_RETENTION, name='jobs'):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.max_workers = max_workers
+        self.retention = retention
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def _update(self, job_id, **fields):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if job:
+                job.update(fields)
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._update(job_id, status='running', started_at=time.time())
+        try:
+            result = fn(*args, **kwargs)
+            self._update(job_id, status='done', result=result, finished_at=time.time())
+        except Exception as e:
+            logging.error(f"Background job {job_id} failed: {e}")
+            self._update(job_id, status='failed', error=str(e), finished_at=time.time())
+
+    def _prune(self):
+        cutoff = time.time() - self.retention
+        with self.lock:
+            expired = [job_id for job_id, job in self.jobs.items()
+                       if job.get('finished_at') and job['finished_at'] < cutoff]
+            for job_id in expired:
+                del self.jobs[job_id]
+
+    def submit(self, fn, *args, metadata=None, **kwargs):
+        """Queues fn(*args, **kwargs) and returns the new job ID."""
+        self._prune()
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            self.jobs[job_id] = {
+                'job_id': job_id,
+                'status': 'queued',
+                'created_at': time.time(),
+                **(metadata or {}),
+            }
+        self.executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def get(self, job_id):
+        """Returns a copy of the job's status, or None if it is unknown."""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return dict(job) if job else None
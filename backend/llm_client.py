@@ -0,0 +1,264 @@
+import logging
+import os
+import random
+import threading
+import time
+
+import groq
+import httpx
+from flask import jsonify
+
+# --- Shared Groq Client ---
+# One client per process, so the HTTP connection pool (and its TLS sessions) is
+# reused across analyses instead of being rebuilt on every call. Every call gets
+# a deadline, retries 429/5xx/connection errors with jittered exponential backoff,
+# and waits on a semaphore that caps concurrent LLM calls. After repeated failures
+# a circuit breaker opens and calls fail fast with CircuitOpenError, so callers
+# can answer with the local verdict instead of pinning a worker on a slow upstream.
+#
+# GROQ_BASE_URL points the client at another server, e.g. a local stub for tests.
+
+GROQ_API_KEY = os.environ.get("GROQ_API_KEY", "REMOVED")
+GROQ_BASE_URL = os.environ.get('GROQ_BASE_URL')
+LLM_TIMEOUT = float(os.environ.get('LLM_TIMEOUT', 30))             # seconds per call, including retries
+LLM_CONNECT_TIMEOUT = float(os.environ.get('LLM_CONNECT_TIMEOUT', 5))
+LLM_MAX_RETRIES = int(os.environ.get('LLM_MAX_RETRIES', 2))
+LLM_RETRY_BASE_DELAY = float(os.environ.get('LLM_RETRY_BASE_DELAY', 0.5))
+LLM_RETRY_MAX_DELAY = float(os.environ.get('LLM_RETRY_MAX_DELAY', 8))
+LLM_MAX_CONCURRENCY = int(os.environ.get('LLM_MAX_CONCURRENCY', 8))
+LLM_KEEPALIVE_CONNECTIONS = int(os.environ.get('LLM_KEEPALIVE_CONNECTIONS', 10))
+LLM_BREAKER_THRESHOLD = int(os.environ.get('LLM_BREAKER_THRESHOLD', 5))    # consecutive failures
+LLM_BREAKER_COOLDOWN = float(os.environ.get('LLM_BREAKER_COOLDOWN', 30))  # seconds before a trial call
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the LLM while the circuit breaker is open."""
+
+
+class LLMTimeoutError(Exception):
+    """Raised when a call could not finish (or start) before its deadline."""
+
+
+def is_retryable(error):
+    if isinstance(error, (groq.APIConnectionError, groq.APITimeoutError, groq.RateLimitError)):
+        return True
+    return isinstance(error, groq.APIStatusError) and error.status_code >= 500
+
+
+def retry_after(error):
+    """Seconds the server asked us to wait (Retry-After header), if any."""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """
+    closed    - calls go through; consecutive failures are counted
+    open      - calls fail fast until the cooldown has passed
+    half_open - one trial call is let through; success closes, failure re-opens
+    """
+
+    def __init__(self, threshold=LLM_BREAKER_THRESHOLD, cooldown=LLM_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.lock = threading.Lock()
+
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < self.cooldown:
+            return 'open'
+        return 'half_open'
+
+    def allow(self):
+        with self.lock:
+            state = self.state()
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_running = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.trial_running or self.failures >= self.threshold:
+                if self.opened_at is None:
+                    logging.warning(f"LLM circuit breaker opened after {self.failures} failures.")
+                self.opened_at = time.monotonic()
+            self.trial_running = False
+
+    def cancel_trial(self):
+        """Gives up a half-open trial slot without a result."""
+        with self.lock:
+            self.trial_running = False
+
+
+class LLMClient:
+    def __init__(self, api_key=GROQ_API_KEY, base_url=GROQ_BASE_URL, timeout=LLM_TIMEOUT,
+                 max_retries=LLM_MAX_RETRIES, max_concurrency=LLM_MAX_CONCURRENCY):
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(max_connections=max_concurrency * 2,
+                                max_keepalive_connections=LLM_KEEPALIVE_CONNECTIONS),
+            timeout=httpx.Timeout(timeout, connect=LLM_CONNECT_TIMEOUT),
+        )
+        # Retries are done here (with the deadline in mind), not by the SDK.
+        self.client = groq.Groq(api_key=api_key, base_url=base_url, max_retries=0, http_client=self.http_client)
+        self.semaphore = threading.BoundedSemaphore(max_concurrency)
+        self.breaker = CircuitBreaker()
+        self.stats_lock = threading.Lock()
+        self.stats_counts = {'calls': 0, 'succeeded': 0, 'failed': 0, 'retries': 0,
+                             'rejected': 0, 'timeouts': 0, 'aborted': 0, 'in_flight': 0}
+
+    def _count(self, name, delta=1):
+        with self.stats_lock:
+            self.stats_counts[name] += delta
+
+    def _acquire(self, deadline):
+        if not self.breaker.allow():
+            self._count('rejected')
+            raise CircuitOpenError("LLM circuit breaker is open.")
+        if not self.semaphore.acquire(timeout=max(0, deadline - time.monotonic())):
+            # Never got to call the LLM, so this says nothing about its health.
+            self.breaker.cancel_trial()
+            self._count('timeouts')
+            raise LLMTimeoutError("Timed out waiting for a free LLM slot.")
+        self._count('in_flight')
+
+    def _release(self):
+        self._count('in_flight', -1)
+        self.semaphore.release()
+
+    def _create(self, deadline, kwargs):
+        """Calls the API with retries until it succeeds, fails for good or runs out of time."""
+        attempt = 0
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._count('timeouts')
+                raise LLMTimeoutError("LLM call deadline exceeded.")
+            try:
+                return self.client.chat.completions.create(timeout=remaining, **kwargs)
+            except Exception as e:
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                # Full jitter: spread retries out so workers do not retry in lockstep.
+                delay = random.uniform(0, min(LLM_RETRY_MAX_DELAY, LLM_RETRY_BASE_DELAY * 2 ** attempt))
+                delay = max(delay, retry_after(e) or 0)
+                if time.monotonic() + delay >= deadline:
+                    raise
+                logging.warning(f"LLM call failed ({e}); retrying in {delay:.2f}s.")
+                self._count('retries')
+                attempt += 1
+                time.sleep(delay)
+
+    def _record(self, error):
+        if error is None:
+            self.breaker.record_success()
+            self._count('succeeded')
+        else:
+            self._count('failed')
+            if isinstance(error, LLMTimeoutError) or is_retryable(error):
+                self.breaker.record_failure()
+            else:
+                # Bad requests are our fault: they neither prove the upstream healthy
+                # nor unhealthy, so they only hand back a half-open trial slot.
+                self.breaker.cancel_trial()
+
+    def _abort(self):
+        """The call was interrupted (e.g. GeneratorExit, KeyboardInterrupt) before it finished."""
+        self.breaker.cancel_trial()
+        self._count('aborted')
+
+    def chat(self, timeout=None, **kwargs):
+        """chat.completions.create() with a deadline, retries, the concurrency cap and the breaker."""
+        deadline = time.monotonic() + (timeout or self.timeout)
+        self._count('calls')
+        self._acquire(deadline)
+        try:
+            result = self._create(deadline, kwargs)
+        except Exception as e:
+            self._record(e)
+            raise
+        except BaseException:
+            self._abort()
+            raise
+        finally:
+            self._release()
+        self._record(None)
+        return result
+
+    def stream(self, timeout=None, **kwargs):
+        """
+        Streaming chat completion; yields chunks. Retries only happen before the
+        first chunk, and the concurrency slot is held until the stream is consumed.
+        A stream closed before its last chunk counts as aborted, not as a success.
+        """
+        deadline = time.monotonic() + (timeout or self.timeout)
+        self._count('calls')
+        self._acquire(deadline)
+        error = None
+        finished = False
+        try:
+            for chunk in self._create(deadline, dict(kwargs, stream=True)):
+                yield chunk
+                if time.monotonic() > deadline:
+                    raise LLMTimeoutError("LLM stream deadline exceeded.")
+            finished = True
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            self._release()
+            # GeneratorExit is not an Exception, so a consumer that stops early lands here
+            if finished or error is not None:
+                self._record(error)
+            else:
+                self._abort()
+
+    def stats(self):
+        with self.stats_lock:
+            stats = dict(self.stats_counts)
+        stats['breaker'] = self.breaker.state()
+        stats['max_concurrency'] = self.max_concurrency
+        return stats
+
+
+# --- Shared client instance ---
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client():
+    """Returns the process-wide LLM client, configured from the environment."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = LLMClient()
+    return _client
+
+
+def register_llm_stats_route(app):
+    """Adds GET /api/llm/stats to a service that calls the LLM."""
+    @app.route('/api/llm/stats', methods=['GET'])
+    def llm_stats():
+        return jsonify(get_llm_client().stats())
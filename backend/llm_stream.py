@@ -0,0 +1,72 @@
+import json
+import re
+
+# --- Streaming LLM Helpers ---
+# The analysis prompt asks the model for a JSON object. When the completion is
+# streamed, the explanation is a string value inside that object, so the text has
+# to be picked out of the partial JSON as it arrives and passed on as
+# server-sent events.
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+def sse_event(event, data):
+    """Formats one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class JsonFieldStreamer:
+    """
+    Extracts the value of one string field from a JSON document that arrives in chunks.
+    feed() returns the newly decoded characters of that value (often an empty string).
+    """
+
+    def __init__(self, field):
+        self.start = re.compile(r'"' + re.escape(field) + r'"\s*:\s*"')
+        self.buffer = ''
+        self.position = None  # index of the next unread character of the value
+        self.done = False
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        if self.done:
+            return ''
+        if self.position is None:
+            match = self.start.search(self.buffer)
+            if not match:
+                return ''
+            self.position = match.end()
+
+        decoded = []
+        i = self.position
+        while i < len(self.buffer):
+            char = self.buffer[i]
+            if char == '"':
+                self.done = True
+                i += 1
+                break
+            if char != '\\':
+                decoded.append(char)
+                i += 1
+                continue
+            # Escape sequence: wait for the rest of it if it is split across chunks
+            if i + 1 >= len(self.buffer):
+                break
+            code = self.buffer[i + 1]
+            if code == 'u':
+                if i + 6 > len(self.buffer):
+                    break
+                try:
+                    decoded.append(chr(int(self.buffer[i + 2:i + 6], 16)))
+                except ValueError:
+                    pass
+                i += 6
+            else:
+                decoded.append(_ESCAPES.get(code, code))
+                i += 2
+        self.position = i
+        return ''.join(decoded)
+
+    def text(self):
+        """The complete document received so far."""
+        return self.buffer
@@ -0,0 +1,107 @@
+import math
+
+# --- Local (non-LLM) Skincare Analysis Helpers ---
+# The overall verdict is decided from the ingredient verdicts stored in our
+# database; the LLM only adds the explanation. These helpers build a complete
+# analysis without calling the LLM, so "fast" mode can answer in milliseconds
+# and the explanation can be fetched afterwards.
+
+BAD_KEYWORDS = ["bad", "danger", "harmful", "toxic"]
+GOOD_KEYWORDS = ["good", "beneficial", "safe"]
+
+# Marks a result whose explanation is templated and an LLM one is on its way.
+EXPLANATION_PENDING = "pending"
+# Marks a result whose explanation is templated because the LLM is unavailable.
+EXPLANATION_UNAVAILABLE = "unavailable"
+
+
+def map_verdict(verdict):
+    """Keyword-based mapping of a free-text verdict to good / moderate / bad."""
+    v = (verdict or '').lower()
+    if any(k in v for k in BAD_KEYWORDS):
+        return "bad"
+    elif any(k in v for k in GOOD_KEYWORDS):
+        return "good"
+    else:
+        return "moderate"
+
+
+def split_by_contribution(ingredients_list, at_least_one=True):
+    """
+    Splits an ingredient list by position: top 10% highly contributing,
+    last 30% least contributing, the rest moderate.
+    """
+    total_ingredients = len(ingredients_list)
+    highly_contributing_count = math.ceil(total_ingredients * 0.1)
+    least_contributing_count = math.ceil(total_ingredients * 0.3)
+    if at_least_one:
+        highly_contributing_count = max(1, highly_contributing_count)
+        least_contributing_count = max(1, least_contributing_count)
+
+    highly_contributing_list = ingredients_list[:highly_contributing_count]
+    moderate_ingredients_list = ingredients_list[highly_contributing_count:total_ingredients - least_contributing_count]
+    least_contributing_list = ingredients_list[total_ingredients - least_contributing_count:]
+    return highly_contributing_list, moderate_ingredients_list, least_contributing_list
+
+
+def classify_ingredient(ing):
+    """Per-ingredient entry in the same shape the LLM returns."""
+    raw_verdict = str(ing.get('verdict') or 'Unknown')
+    verdict = "Unknown" if raw_verdict.strip().lower() == 'unknown' else map_verdict(raw_verdict).capitalize()
+    return {
+        "ingredient_name": ing.get('ingredient_name'),
+        "verdict": verdict,
+        "side_effects": ing.get('side_effect') or 'N/A',
+    }
+
+
+def count_verdicts(*ing_lists):
+    """Counts Good / Moderate / Bad / Unknown verdicts across classified ingredient lists."""
+    counts = {"good": 0, "moderate": 0, "bad": 0, "unknown": 0}
+    for ing_list in ing_lists:
+        for ing in ing_list:
+            verdict = str(ing.get('verdict', 'unknown')).lower()
+            counts[verdict if verdict in counts else 'unknown'] += 1
+    return counts
+
+
+def template_explanation(product_name, skin_type, overall_verdict, highly, moderate, least):
+    """A short explanation assembled from the classified ingredients."""
+    everything = highly + moderate + least
+    good = [ing['ingredient_name'] for ing in everything if ing['verdict'] == 'Good']
+    bad = [ing for ing in everything if ing['verdict'] == 'Bad']
+    unknown = sum(1 for ing in everything if ing['verdict'] == 'Unknown')
+    top = ", ".join(f"{ing['ingredient_name']} ({ing['verdict'].lower()})" for ing in highly)
+
+    sentences = [
+        f"{product_name or 'This product'} is rated {overall_verdict} for {skin_type or 'your'} skin "
+        f"based on {len(everything)} ingredients."
+    ]
+    if top:
+        sentences.append(f"The most concentrated ingredients are {top}.")
+    if good:
+        sentences.append(f"Beneficial ingredients include {', '.join(good[:5])}.")
+    if bad:
+        concerns = "; ".join(
+            f"{ing['ingredient_name']} ({ing['side_effects']})" if ing['side_effects'] != 'N/A' else ing['ingredient_name']
+            for ing in bad[:5]
+        )
+        sentences.append(f"Ingredients of concern: {concerns}.")
+    if unknown:
+        sentences.append(f"{unknown} ingredient(s) were not found in our database.")
+    return " ".join(sentences)
+
+
+def local_analysis(product_name, skin_type, overall_verdict, highly_list, moderate_list, least_list):
+    """Builds a full analysis result from already-bucketed ingredients and a computed verdict."""
+    highly = [classify_ingredient(ing) for ing in highly_list]
+    moderate = [classify_ingredient(ing) for ing in moderate_list]
+    least = [classify_ingredient(ing) for ing in least_list]
+    return {
+        "overall_verdict": overall_verdict,
+        "overall_explanation": template_explanation(product_name, skin_type, overall_verdict, highly, moderate, least),
+        "highly_contributing": highly,
+        "moderate_ingredients": moderate,
+        "least_contributing": least,
+        "summary": count_verdicts(highly, moderate, least),
+    }
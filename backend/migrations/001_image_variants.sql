@@ -0,0 +1,6 @@
+-- Thumbnail and medium-size copies of product.image, built at upload time
+-- by image_variants.py. Safe to run more than once.
+-- Existing rows can be filled in with: python image_variants.py --backfill
+
+ALTER TABLE product ADD COLUMN IF NOT EXISTS image_thumb bytea[];
+ALTER TABLE product ADD COLUMN IF NOT EXISTS image_medium bytea[];
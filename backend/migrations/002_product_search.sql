@@ -0,0 +1,33 @@
+-- Full-text search over products, used by GET /api/search/filter-products?mode=fulltext
+-- (see product_search.py). Safe to run more than once.
+--
+-- search_vector is kept up to date by a trigger. Weights: product name A, brand B,
+-- ingredients C, description D. The 'english' text search configuration here must
+-- match the one in product_search.py's queries. The trigram index lets the partial-word ILIKE
+-- match on product_name (both search modes) use an index instead of a full scan.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE product ADD COLUMN IF NOT EXISTS search_vector tsvector;
+
+CREATE OR REPLACE FUNCTION product_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.product_name, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(NEW.brand_name, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(array_to_string(NEW.ingredients_list, ' '), '')), 'C') ||
+        setweight(to_tsvector('english', coalesce(NEW.description, '')), 'D');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS product_search_vector_update ON product;
+CREATE TRIGGER product_search_vector_update
+    BEFORE INSERT OR UPDATE OF product_name, brand_name, ingredients_list, description ON product
+    FOR EACH ROW EXECUTE FUNCTION product_search_vector();
+
+-- Fill in rows written before the trigger existed (the trigger computes the value).
+UPDATE product SET product_name = product_name WHERE search_vector IS NULL;
+
+CREATE INDEX IF NOT EXISTS product_search_vector_idx ON product USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS product_name_trgm_idx ON product USING GIN (product_name gin_trgm_ops);
@@ -0,0 +1,11 @@
+-- Indexes for the faceted product filter (GET /api/products/filter, see
+-- product_filters.py). Safe to run more than once.
+--
+-- Each filter can use its own index; PostgreSQL combines them (BitmapAnd) when
+-- several filters are given, and pages walk product_id in order.
+
+CREATE INDEX IF NOT EXISTS product_skin_type_idx ON product (skin_type, product_id);
+CREATE INDEX IF NOT EXISTS product_product_type_idx ON product (product_type, product_id);
+CREATE INDEX IF NOT EXISTS product_brand_name_idx ON product (brand_name, product_id);
+CREATE INDEX IF NOT EXISTS product_price_idx ON product (price);
+CREATE INDEX IF NOT EXISTS accepted_products_verdict_idx ON accepted_products (lower(overall_verdict), product_id);
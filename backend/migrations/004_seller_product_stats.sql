@@ -0,0 +1,83 @@
+-- Per-seller accepted/rejected product counts, read by GET /api/seller/<id>/product-counts
+-- instead of counting joins on every dashboard load. Safe to run more than once.
+--
+-- Statement-level triggers on accepted_products and rejected_products keep the
+-- counts up to date in the same transaction as the change, so uploads (sync and
+-- async), product deletes and seller deletes are all covered. The stats row goes
+-- away with its seller. Rebuild or check the table with:
+--   python seller_stats.py --rebuild [seller_id]
+--   python seller_stats.py --check
+
+CREATE TABLE IF NOT EXISTS seller_product_stats (
+    seller_id integer PRIMARY KEY REFERENCES seller (seller_id) ON DELETE CASCADE,
+    accepted_products integer NOT NULL DEFAULT 0,
+    rejected_products integer NOT NULL DEFAULT 0,
+    updated_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Applies the rows inserted into / deleted from accepted_products or rejected_products.
+-- Verdict rows are always removed before their product, so the owner can still be looked up.
+CREATE OR REPLACE FUNCTION seller_product_stats_apply() RETURNS trigger AS $$
+DECLARE
+    delta integer := CASE TG_OP WHEN 'INSERT' THEN 1 ELSE -1 END;
+    is_accepted boolean := TG_TABLE_NAME = 'accepted_products';
+BEGIN
+    INSERT INTO seller_product_stats AS s (seller_id, accepted_products, rejected_products)
+    SELECT
+        p.seller_id,
+        CASE WHEN is_accepted THEN delta * count(*) ELSE 0 END,
+        CASE WHEN is_accepted THEN 0 ELSE delta * count(*) END
+    FROM changed_rows c
+    JOIN product p ON p.product_id = c.product_id
+    WHERE p.seller_id IS NOT NULL
+    GROUP BY p.seller_id
+    ON CONFLICT (seller_id) DO UPDATE SET
+        accepted_products = s.accepted_products + EXCLUDED.accepted_products,
+        rejected_products = s.rejected_products + EXCLUDED.rejected_products,
+        updated_at = now();
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS seller_stats_accepted_insert ON accepted_products;
+CREATE TRIGGER seller_stats_accepted_insert
+    AFTER INSERT ON accepted_products REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION seller_product_stats_apply();
+
+DROP TRIGGER IF EXISTS seller_stats_accepted_delete ON accepted_products;
+CREATE TRIGGER seller_stats_accepted_delete
+    AFTER DELETE ON accepted_products REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION seller_product_stats_apply();
+
+DROP TRIGGER IF EXISTS seller_stats_rejected_insert ON rejected_products;
+CREATE TRIGGER seller_stats_rejected_insert
+    AFTER INSERT ON rejected_products REFERENCING NEW TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION seller_product_stats_apply();
+
+DROP TRIGGER IF EXISTS seller_stats_rejected_delete ON rejected_products;
+CREATE TRIGGER seller_stats_rejected_delete
+    AFTER DELETE ON rejected_products REFERENCING OLD TABLE AS changed_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION seller_product_stats_apply();
+
+-- Backfill, same query as seller_stats.rebuild_stats(). Writers wait while it runs.
+BEGIN;
+LOCK TABLE accepted_products, rejected_products IN SHARE MODE;
+WITH accepted AS (
+    SELECT p.seller_id, count(*) AS n
+    FROM accepted_products ap JOIN product p ON ap.product_id = p.product_id
+    GROUP BY p.seller_id
+), rejected AS (
+    SELECT p.seller_id, count(*) AS n
+    FROM rejected_products rp JOIN product p ON rp.product_id = p.product_id
+    GROUP BY p.seller_id
+)
+INSERT INTO seller_product_stats AS s (seller_id, accepted_products, rejected_products)
+SELECT se.seller_id, coalesce(a.n, 0), coalesce(r.n, 0)
+FROM seller se
+LEFT JOIN accepted a ON a.seller_id = se.seller_id
+LEFT JOIN rejected r ON r.seller_id = se.seller_id
+ON CONFLICT (seller_id) DO UPDATE SET
+    accepted_products = EXCLUDED.accepted_products,
+    rejected_products = EXCLUDED.rejected_products,
+    updated_at = now();
+COMMIT;
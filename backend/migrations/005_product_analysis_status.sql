@@ -0,0 +1,19 @@
+-- Analysis state of products uploaded with mode=async. Safe to run more than once.
+--
+--   NULL      analysis stored (or the product was uploaded synchronously)
+--   'pending' queued or running; re-queued by the sweep in 1_3_acc.py if it goes stale
+--   'failed'  the last attempt failed; retried until analysis_attempts reaches ANALYSIS_MAX_ATTEMPTS
+--
+-- The status is committed with the product row, so a job lost to a restart is
+-- still visible here and is picked up again.
+
+ALTER TABLE product ADD COLUMN IF NOT EXISTS analysis_status text;
+ALTER TABLE product ADD COLUMN IF NOT EXISTS analysis_error text;
+ALTER TABLE product ADD COLUMN IF NOT EXISTS analysis_attempts integer NOT NULL DEFAULT 0;
+ALTER TABLE product ADD COLUMN IF NOT EXISTS analysis_updated_at timestamptz;
+
+-- Only unfinished products are indexed, so the sweep and the dashboard counts stay cheap.
+CREATE INDEX IF NOT EXISTS product_analysis_status_idx ON product (analysis_status, analysis_updated_at)
+    WHERE analysis_status IS NOT NULL;
+CREATE INDEX IF NOT EXISTS product_analysis_seller_idx ON product (seller_id)
+    WHERE analysis_status IS NOT NULL;
@@ -0,0 +1,28 @@
+-- SHA-256 (hex) of every product photo as served by GET /api/product/<id>/image/<n>,
+-- one entry per photo, used as its ETag (see image_routes.py). Safe to run more than once.
+--
+-- Each variant's hash is of the bytes that variant serves, so image_thumb_hash and
+-- image_medium_hash hold the original's hash where no thumbnail/medium exists.
+-- The upload endpoint and image_variants.py --backfill write them with the images.
+
+ALTER TABLE product ADD COLUMN IF NOT EXISTS image_hash text[];
+ALTER TABLE product ADD COLUMN IF NOT EXISTS image_thumb_hash text[];
+ALTER TABLE product ADD COLUMN IF NOT EXISTS image_medium_hash text[];
+
+-- Fill in rows written before the columns existed.
+UPDATE product p SET
+    image_hash = h.image_hash,
+    image_thumb_hash = h.image_thumb_hash,
+    image_medium_hash = h.image_medium_hash
+FROM (
+    SELECT
+        product_id,
+        array_agg(encode(sha256(original), 'hex') ORDER BY n) AS image_hash,
+        array_agg(encode(sha256(coalesce(thumb, original)), 'hex') ORDER BY n) AS image_thumb_hash,
+        array_agg(encode(sha256(coalesce(medium, original)), 'hex') ORDER BY n) AS image_medium_hash
+    FROM product,
+        unnest(image, image_thumb, image_medium) WITH ORDINALITY AS u(original, thumb, medium, n)
+    WHERE image_hash IS NULL AND image IS NOT NULL
+    GROUP BY product_id
+) h
+WHERE p.product_id = h.product_id;
@@ -0,0 +1,118 @@
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+# --- EasyOCR Worker Pool ---
+# EasyOCR is CPU-bound and a single Reader serializes every request, so OCR
+# runs in a pool of worker processes, each holding its own pre-loaded Reader.
+# OCR_WORKERS=0 keeps a single Reader in this process instead (useful with a GPU
+# or for debugging).
+#
+# These functions live in their own module (not 3_4_ocr.py) because worker
+# processes need to import them by name.
+
+OCR_WORKERS = int(os.environ.get('OCR_WORKERS', 2))
+OCR_LANGUAGES = os.environ.get('OCR_LANGUAGES', 'en').split(',')
+OCR_GPU = os.environ.get('OCR_GPU', '0') == '1'
+# Torch threads per worker; keeps N workers from oversubscribing the CPU (0 = torch default).
+OCR_THREADS_PER_WORKER = int(os.environ.get('OCR_THREADS_PER_WORKER', 1))
+# 'spawn' avoids forking a process that may already have torch threads running.
+OCR_START_METHOD = os.environ.get('OCR_START_METHOD', 'spawn')
+
+# The Reader owned by this process (a pool worker, or the main process when OCR_WORKERS=0).
+_reader = None
+# How long this process spent importing easyocr/torch and building the Reader.
+_load_timings = {}
+
+
+def init_reader(languages=OCR_LANGUAGES, gpu=OCR_GPU, threads=OCR_THREADS_PER_WORKER):
+    """Loads the EasyOCR Reader for the current process."""
+    global _reader
+    if _reader is not None:
+        return _reader
+    started = time.perf_counter()
+    import easyocr
+    import torch
+    if threads:
+        torch.set_num_threads(threads)
+    imported = time.perf_counter()
+    _reader = easyocr.Reader(languages, gpu=gpu)
+    _load_timings.update({
+        'pid': os.getpid(),
+        'import_ms': round((imported - started) * 1000, 2),
+        'model_load_ms': round((time.perf_counter() - imported) * 1000, 2),
+    })
+    return _reader
+
+
+def read_text(image):
+    """Runs OCR on a decoded image and returns the detected strings."""
+    return init_reader().readtext(image, detail=0)
+
+
+def worker_ready():
+    """Task used to wait for a worker's Reader; returns that worker's load timings."""
+    return dict(_load_timings)
+
+
+def decode_image(data):
+    """Decodes uploaded image bytes straight into an OpenCV (BGR) array - no temp files."""
+    image = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode image.")
+    return image
+
+
+class OCRPool:
+    """Dispatches OCR to pre-warmed worker processes (or to an in-process Reader)."""
+
+    def __init__(self, workers=OCR_WORKERS, languages=OCR_LANGUAGES, gpu=OCR_GPU):
+        self.workers = workers
+        self.executor = None
+        self.lock = threading.Lock()  # only used when OCR runs in-process
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context(OCR_START_METHOD),
+                initializer=init_reader,
+                initargs=(languages, gpu, OCR_THREADS_PER_WORKER),
+            )
+        else:
+            init_reader(languages, gpu, threads=0)
+
+    def warm_up(self):
+        """Blocks until the workers have loaded their models; returns their load timings."""
+        if self.executor is None:
+            return [worker_ready()]
+        futures = [self.executor.submit(worker_ready) for _ in range(self.workers)]
+        timings = {}
+        for future in futures:
+            result = future.result()
+            timings[result.get('pid')] = result
+        logging.info(f"OCR pool ready with {self.workers} workers.")
+        return list(timings.values())
+
+    def submit(self, image):
+        """Queues OCR for a decoded image and returns a Future."""
+        if self.executor is not None:
+            return self.executor.submit(read_text, image)
+        future = Future()
+        try:
+            with self.lock:
+                future.set_result(read_text(image))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def readtext(self, image):
+        return self.submit(image).result()
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,120 @@
+import os
+import time
+
+import cv2
+import numpy as np
+
+# --- OCR Preprocessing ---
+# EasyOCR's detection and recognition time grows with pixel count, and phone
+# photos of ingredient labels are often 12MP+. Before readtext() we downscale
+# to a target long edge, convert to grayscale and optionally deskew and crop
+# to the text region. Each stage is timed so the cost/benefit is visible.
+
+# Presets selectable per request (?preset=...). long_edge=None keeps the original size.
+OCR_PRESETS = {
+    'none': {'long_edge': None, 'grayscale': False, 'deskew': False, 'crop': False},
+    'fast': {'long_edge': 1280, 'grayscale': True, 'deskew': False, 'crop': False},
+    'balanced': {'long_edge': 1600, 'grayscale': True, 'deskew': True, 'crop': False},
+    'accurate': {'long_edge': 2400, 'grayscale': True, 'deskew': True, 'crop': True},
+}
+OCR_PRESET = os.environ.get('OCR_PRESET', 'balanced')
+
+# Skew angles outside this range are treated as detection noise and ignored.
+MIN_SKEW_DEGREES = 0.5
+MAX_SKEW_DEGREES = 30
+
+
+def get_preset(name=None):
+    """Returns (name, settings) for a preset, defaulting to OCR_PRESET."""
+    name = name or OCR_PRESET
+    if name not in OCR_PRESETS:
+        raise ValueError(f"Unknown preset '{name}'. Choose from: {', '.join(OCR_PRESETS)}")
+    return name, OCR_PRESETS[name]
+
+
+def downscale(image, long_edge):
+    height, width = image.shape[:2]
+    scale = long_edge / max(height, width)
+    if scale >= 1:
+        return image
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def to_grayscale(image):
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+
+def text_mask(gray):
+    """Binary mask of dark-on-light (or light-on-dark) text pixels."""
+    _, mask = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    # Text is the minority class; flip the mask if most pixels came out "on".
+    if cv2.countNonZero(mask) > mask.size / 2:
+        mask = cv2.bitwise_not(mask)
+    return mask
+
+
+def deskew(image):
+    """Rotates the image so the dominant text lines are horizontal."""
+    gray = to_grayscale(image)
+    # Smear characters into line-shaped blobs so the angle follows the lines of text.
+    mask = cv2.dilate(text_mask(gray), cv2.getStructuringElement(cv2.MORPH_RECT, (15, 3)))
+    points = cv2.findNonZero(mask)
+    if points is None:
+        return image
+    (_, _), (width, height), angle = cv2.minAreaRect(points)
+    # Normalize OpenCV's angle convention to the rotation of the long side.
+    if width < height:
+        angle -= 90
+    if angle < -45:
+        angle += 180
+    elif angle > 45:
+        angle -= 180
+    if not MIN_SKEW_DEGREES <= abs(angle) <= MAX_SKEW_DEGREES:
+        return image
+    rows, cols = image.shape[:2]
+    matrix = cv2.getRotationMatrix2D((cols / 2, rows / 2), angle, 1.0)
+    return cv2.warpAffine(image, matrix, (cols, rows), flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_REPLICATE)
+
+
+def crop_to_text(image, margin=0.02):
+    """Crops to the bounding box of the text pixels, plus a small margin."""
+    mask = text_mask(to_grayscale(image))
+    # Open removes speckle noise so it does not stretch the bounding box.
+    mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+    points = cv2.findNonZero(mask)
+    if points is None:
+        return image
+    x, y, width, height = cv2.boundingRect(points)
+    rows, cols = image.shape[:2]
+    pad_x, pad_y = int(cols * margin), int(rows * margin)
+    x0, y0 = max(0, x - pad_x), max(0, y - pad_y)
+    x1, y1 = min(cols, x + width + pad_x), min(rows, y + height + pad_y)
+    return image[y0:y1, x0:x1]
+
+
+def preprocess(image, settings):
+    """
+    Runs the enabled stages on a decoded image.
+    Returns (image, timings) where timings maps stage name -> milliseconds.
+    """
+    timings = {}
+
+    def timed(stage, fn, *args):
+        started = time.perf_counter()
+        result = fn(*args)
+        timings[stage] = round((time.perf_counter() - started) * 1000, 2)
+        return result
+
+    if settings.get('long_edge'):
+        image = timed('downscale', downscale, image, settings['long_edge'])
+    if settings.get('grayscale'):
+        image = timed('grayscale', to_grayscale, image)
+    if settings.get('deskew'):
+        image = timed('deskew', deskew, image)
+    if settings.get('crop'):
+        image = timed('crop', crop_to_text, image)
+    return image, timings
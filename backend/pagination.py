@@ -0,0 +1,99 @@
+import base64
+import json
+import os
+
+# --- Keyset Pagination and Field Projection ---
+# Listing endpoints accept:
+#   ?limit=N        page size (capped at MAX_PAGE_SIZE)
+#   ?cursor=...     opaque cursor from the previous page's "next"
+#   ?fields=a,b     only return these fields (e.g. leave out "image")
+# When limit or cursor is given the response is {"items": [...], "next": cursor-or-null};
+# without them the endpoint keeps returning a plain JSON array.
+
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 24))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 100))
+
+
+def encode_cursor(values):
+    """Turns the sort key of the last row on a page into an opaque cursor string."""
+    raw = json.dumps(values, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, key_types=None):
+    """
+    Reverses encode_cursor(). Raises ValueError for cursors we did not issue.
+    key_types, if given, holds the allowed type(s) of each sort key value, e.g. (int,).
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor")
+    if key_types is not None:
+        if len(values) != len(key_types):
+            raise ValueError("Invalid cursor")
+        for value, allowed in zip(values, key_types):
+            # bool is an int subclass, but never a valid sort key
+            if isinstance(value, bool) or not isinstance(value, allowed):
+                raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_page_args(args, key_types=(int,)):
+    """
+    Reads limit/cursor from the query string.
+    Returns (paginated, limit, after) where after is the decoded cursor or None.
+    key_types describes the endpoint's sort key (default: a product_id), so a
+    malformed cursor is a ValueError here rather than an error in the query.
+    """
+    limit_arg = args.get('limit')
+    cursor_arg = args.get('cursor')
+    if limit_arg is None and cursor_arg is None:
+        return False, None, None
+
+    limit = DEFAULT_PAGE_SIZE
+    if limit_arg is not None:
+        try:
+            limit = int(limit_arg)
+        except ValueError:
+            raise ValueError("limit must be an integer")
+        if limit < 1:
+            raise ValueError("limit must be at least 1")
+        limit = min(limit, MAX_PAGE_SIZE)
+
+    after = decode_cursor(cursor_arg, key_types) if cursor_arg else None
+    return True, limit, after
+
+
+def parse_fields(args, allowed):
+    """Returns the requested fields (in the order of `allowed`), or all of them if fields= is absent."""
+    fields_arg = args.get('fields')
+    if not fields_arg:
+        return list(allowed)
+    requested = {f.strip() for f in fields_arg.split(',') if f.strip()}
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+    return [f for f in allowed if f in requested]
+
+
+def select_list(columns, fields, always=('product_id',)):
+    """Builds a SELECT list from a field -> SQL expression map, always keeping the sort key columns."""
+    wanted = [f for f in columns if f in fields or f in always]
+    return ", ".join(f"{columns[f]} AS {f}" for f in wanted)
+
+
+def page_response(items, limit, sort_key, fields=None):
+    """
+    Builds the paginated envelope. `items` must hold up to limit + 1 rows; the extra
+    row only tells us whether there is a next page. sort_key(item) gives the cursor values.
+    """
+    has_more = len(items) > limit
+    items = items[:limit]
+    next_cursor = encode_cursor(sort_key(items[-1])) if has_more and items else None
+    if fields is not None:
+        items = [{k: v for k, v in item.items() if k in fields} for item in items]
+    return {"items": items, "next": next_cursor}
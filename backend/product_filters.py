@@ -0,0 +1,161 @@
+import os
+from decimal import Decimal, InvalidOperation
+
+# --- Faceted Product Filters ---
+# GET /api/products/filter takes any combination of
+#   ?skin_types=a,b  ?product_types=a,b  ?brands=a,b  ?verdicts=good,moderate
+#   ?min_price=N  ?max_price=N
+# Values within one filter are OR-ed, different filters are AND-ed.
+#
+# Facet counts (?facets=1) are computed by one grouped query: every facet is a
+# grouping set, and each facet's count applies all the *other* filters, so the
+# counts show how many products picking that value would give. Rows failing two
+# or more filters are dropped before grouping, but that is a plain WHERE: every
+# accepted product is still read, so the query grows with the catalogue rather
+# than with the result. 4_filter_api.py caches the counts per filter combination;
+# bench_filters.py measures the uncached query at 10k/100k/1M products.
+
+# facet name -> (query-string argument, SQL for the facet value)
+LIST_FACETS = {
+    "skin_type": ("skin_types", "p.skin_type"),
+    "product_type": ("product_types", "p.product_type"),
+    "brand": ("brands", "p.brand_name"),
+    "verdict": ("verdicts", "lower(ap.overall_verdict)"),
+}
+FACETS = list(LIST_FACETS) + ["price"]
+
+# Upper bounds of the price facet's buckets: [0, 250), [250, 500), ... [2000, inf)
+PRICE_BUCKETS = [Decimal(b) for b in os.environ.get('FACET_PRICE_BUCKETS', '250,500,1000,2000').split(',') if b.strip()]
+
+
+def parse_price(args, name):
+    value = args.get(name)
+    if value is None or not value.strip():
+        return None
+    try:
+        price = Decimal(value)
+    except InvalidOperation:
+        raise ValueError(f"{name} must be a number")
+    if not price.is_finite() or price < 0:
+        raise ValueError(f"{name} must be a non-negative number")
+    return price
+
+
+def parse_filters(args):
+    """Reads the filter arguments into {facet: [values]} / {"price": (min, max)}. Raises ValueError."""
+    filters = {}
+    for facet, (arg, _) in LIST_FACETS.items():
+        values = [v.strip() for v in (args.get(arg) or '').split(',') if v.strip()]
+        if facet == "verdict":
+            values = [v.lower() for v in values]
+        if values:
+            filters[facet] = sorted(set(values))
+    min_price, max_price = parse_price(args, 'min_price'), parse_price(args, 'max_price')
+    if min_price is not None and max_price is not None and min_price > max_price:
+        raise ValueError("min_price must not be greater than max_price")
+    if min_price is not None or max_price is not None:
+        filters["price"] = (min_price, max_price)
+    return filters
+
+
+def filter_conditions(filters):
+    """Returns ({facet: SQL condition}, params) for the active filters."""
+    conditions, params = {}, {}
+    for facet, values in filters.items():
+        if facet == "price":
+            min_price, max_price = values
+            parts = []
+            if min_price is not None:
+                parts.append("p.price >= %(min_price)s")
+                params["min_price"] = min_price
+            if max_price is not None:
+                parts.append("p.price <= %(max_price)s")
+                params["max_price"] = max_price
+            conditions[facet] = " AND ".join(parts)
+        else:
+            conditions[facet] = f"{LIST_FACETS[facet][1]} = ANY(%({facet})s)"
+            params[facet] = list(values)
+    return conditions, params
+
+
+def products_query(columns, conditions, keyset=False):
+    """One page of matching accepted products, in product_id order."""
+    where = [f"({condition})" for condition in conditions.values()]
+    if keyset:
+        where.append("p.product_id > %(after_id)s")
+    return f"""
+        SELECT {columns}
+        FROM product p
+        INNER JOIN accepted_products ap ON p.product_id = ap.product_id
+        {"WHERE " + " AND ".join(where) if where else ""}
+        ORDER BY p.product_id
+        LIMIT %(limit)s;
+    """
+
+
+def facet_query(conditions):
+    """Counts for every value of every facet in a single GROUPING SETS query."""
+    flags = "".join(f",\n                coalesce({condition}, false) AS {facet}_ok"
+                    for facet, condition in conditions.items())
+    # Rows failing two or more filters cannot show up in any facet's count, so they are
+    # left out of the grouping. The join itself is still read in full.
+    candidates_where = ""
+    if len(conditions) > 1:
+        failed = " + ".join(f"(NOT coalesce({condition}, false))::int" for condition in conditions.values())
+        candidates_where = f"WHERE {failed} <= 1"
+
+    counts = []
+    for facet in FACETS:
+        others = [f"{other}_ok" for other in conditions if other != facet]
+        count_filter = f" FILTER (WHERE {' AND '.join(others)})" if others else ""
+        counts.append(f"count(*){count_filter} AS {facet}_count")
+    counts_sql = ",\n            ".join(counts)
+
+    facet_label = "\n".join(f"                WHEN GROUPING({facet}) = 0 THEN '{facet}'" for facet in FACETS)
+    return f"""
+        WITH candidates AS (
+            SELECT
+                p.skin_type AS skin_type,
+                p.product_type AS product_type,
+                p.brand_name AS brand,
+                lower(ap.overall_verdict) AS verdict,
+                width_bucket(p.price, %(price_buckets)s::numeric[]) AS price{flags}
+            FROM product p
+            INNER JOIN accepted_products ap ON p.product_id = ap.product_id
+            {candidates_where}
+        )
+        SELECT
+            CASE
+{facet_label}
+            END AS facet,
+            {", ".join(FACETS)},
+            {counts_sql}
+        FROM candidates
+        GROUP BY GROUPING SETS ({", ".join(f"({facet})" for facet in FACETS)});
+    """
+
+
+def price_bucket_range(bucket):
+    """(min, max) of a width_bucket() result; max is exclusive and None for the top bucket."""
+    low = PRICE_BUCKETS[bucket - 1] if bucket > 0 else Decimal(0)
+    high = PRICE_BUCKETS[bucket] if bucket < len(PRICE_BUCKETS) else None
+    return float(low), float(high) if high is not None else None
+
+
+def facet_counts(rows):
+    """Shapes facet_query() rows as {facet: [{value, count}]}, most common values first."""
+    facets = {facet: [] for facet in FACETS}
+    for row in rows:
+        facet = row["facet"]
+        value, count = row[facet], row[f"{facet}_count"]
+        if value is None or not count:
+            continue
+        if facet == "price":
+            low, high = price_bucket_range(value)
+            facets[facet].append({"min": low, "max": high, "count": count})
+        else:
+            facets[facet].append({"value": value, "count": count})
+    for facet in LIST_FACETS:
+        facets[facet].sort(key=lambda item: (-item["count"], item["value"]))
+    facets["price"].sort(key=lambda item: item["min"])
+    return facets
@@ -0,0 +1,89 @@
+import os
+
+# --- Product Search Queries ---
+# The queries behind GET /api/search/filter-products, one per search mode:
+#   ilike     - product name contains the term; names starting with it first (the original search)
+#   fulltext  - the maintained search_vector (name, brand, ingredients, description; see
+#               migrations/002_product_search.sql) matched with websearch_to_tsquery and
+#               ordered by ts_rank. Names containing the term also match, so partial words
+#               still find products; the trigram index keeps that part indexed.
+# Both sort ascending on search_rank (lower is better), then name and id, so the same
+# keyset cursor works for either. Full-text results are capped at SEARCH_RESULT_LIMIT.
+# Queries parse the term with the 'english' configuration, the same one the
+# migration's trigger builds search_vector with; change both together.
+
+SEARCH_MODES = ('ilike', 'fulltext')
+SEARCH_MODE = os.environ.get('SEARCH_MODE', 'ilike')
+SEARCH_RESULT_LIMIT = int(os.environ.get('SEARCH_RESULT_LIMIT', 50))
+
+SEARCH_RANK_SQL = {
+    "ilike": """
+    CASE
+        WHEN p.product_name ILIKE %(starts_with)s THEN 1 -- Exact match start has highest priority
+        WHEN p.product_name ILIKE %(anywhere)s THEN 2 -- Contained anywhere has second priority
+        ELSE 3
+    END""",
+    # Negated so that, as above, lower sorts first. float8 keeps the value exact in cursors.
+    "fulltext": """
+    -(coalesce(ts_rank(p.search_vector, websearch_to_tsquery('english', %(search)s)), 0)
+      + CASE WHEN p.product_name ILIKE %(starts_with)s THEN 1 ELSE 0 END)::float8""",
+}
+
+SEARCH_MATCH_SQL = {
+    "ilike": "p.product_name ILIKE %(anywhere)s",
+    "fulltext": """(p.search_vector @@ websearch_to_tsquery('english', %(search)s)
+                       OR p.product_name ILIKE %(anywhere)s)""",
+}
+
+
+def parse_search_mode(args):
+    """Reads ?mode= (defaults to SEARCH_MODE). Raises ValueError for unknown modes."""
+    mode = args.get('mode', SEARCH_MODE).strip().lower()
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"mode must be one of: {', '.join(SEARCH_MODES)}")
+    return mode
+
+
+def search_query(mode, columns, keyset=False):
+    """SELECT for accepted products matching the search; `columns` is the select list."""
+    keyset_clause = ""
+    if keyset:
+        # Pages are keyed on (relevance, name, id), the same order the results are sorted in
+        keyset_clause = (f"AND ({SEARCH_RANK_SQL[mode]}, p.product_name, p.product_id) "
+                         f"> (%(after_rank)s, %(after_name)s, %(after_id)s)")
+    return f"""
+        SELECT
+            {columns},
+            {SEARCH_RANK_SQL[mode]} AS search_rank
+        FROM product p
+        JOIN accepted_products ap ON p.product_id = ap.product_id
+        WHERE {SEARCH_MATCH_SQL[mode]}
+        {keyset_clause}
+        ORDER BY
+            search_rank,
+            p.product_name,
+            p.product_id
+        LIMIT %(limit)s;
+    """
+
+
+def search_params(mode, search_term, limit=None, after=None):
+    """
+    Parameters for search_query(). limit=None means no page size was asked for:
+    unlimited for ilike (as before), SEARCH_RESULT_LIMIT for fulltext.
+    Raises ValueError for a malformed cursor.
+    """
+    if limit is None and mode == 'fulltext':
+        limit = SEARCH_RESULT_LIMIT
+    params = {
+        "search": search_term,
+        "anywhere": f'%{search_term}%',
+        "starts_with": f'{search_term}%',
+        "limit": limit,
+    }
+    if after:
+        try:
+            params["after_rank"], params["after_name"], params["after_id"] = after
+        except ValueError:
+            raise ValueError("Invalid cursor")
+    return params
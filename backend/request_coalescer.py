@@ -0,0 +1,95 @@
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# --- Request Coalescing ---
+# Collects work items that arrive close together and hands them to one batch
+# function call: a batch is sent when it reaches max_batch items or when the
+# first item has waited `window` seconds, whichever comes first. Items with the
+# same key that are already queued or running share one Future (single-flight),
+# so identical concurrent requests are only done once.
+
+
+class RequestCoalescer:
+    def __init__(self, run_batch, window=0.05, max_batch=8, max_workers=4, name='coalescer'):
+        """
+        run_batch(payloads) must return a list aligned with payloads; an Exception
+        in that list fails only the matching item.
+        """
+        self.run_batch = run_batch
+        self.window = window
+        self.max_batch = max_batch
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self.lock = threading.Lock()
+        self.pending = []      # [(key, payload, future)] waiting for the next batch
+        self.in_flight = {}    # key -> Future, for queued and running items
+        self.timer = None
+        self.stats_counts = {'submitted': 0, 'deduplicated': 0, 'batches': 0, 'batched_items': 0}
+
+    def submit(self, key, payload):
+        """Queues payload (or joins an identical in-flight item) and returns a Future for its result."""
+        batch = None
+        with self.lock:
+            self.stats_counts['submitted'] += 1
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.stats_counts['deduplicated'] += 1
+                return future
+            future = Future()
+            self.in_flight[key] = future
+            self.pending.append((key, payload, future))
+            if len(self.pending) >= self.max_batch:
+                batch = self._take()
+            elif len(self.pending) == 1:
+                self.timer = threading.Timer(self.window, self._flush)
+                self.timer.daemon = True
+                self.timer.start()
+        if batch:
+            self.executor.submit(self._run, batch)
+        return future
+
+    def _take(self):
+        """Removes and returns the pending batch. Caller holds the lock."""
+        batch, self.pending = self.pending, []
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        return batch
+
+    def _flush(self):
+        with self.lock:
+            batch = self._take() if self.pending else None
+        if batch:
+            self.executor.submit(self._run, batch)
+
+    def _run(self, batch):
+        with self.lock:
+            self.stats_counts['batches'] += 1
+            self.stats_counts['batched_items'] += len(batch)
+        try:
+            results = self.run_batch([payload for _, payload, _ in batch])
+            if len(results) != len(batch):
+                raise RuntimeError(f"Batch returned {len(results)} results for {len(batch)} items.")
+            for (_, _, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+        except Exception as e:
+            logging.error(f"Batch of {len(batch)} items failed: {e}")
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            with self.lock:
+                for key, _, future in batch:
+                    if self.in_flight.get(key) is future:
+                        del self.in_flight[key]
+
+    def stats(self):
+        with self.lock:
+            stats = dict(self.stats_counts)
+            stats['pending'] = len(self.pending)
+            stats['in_flight'] = len(self.in_flight)
+        stats['average_batch_size'] = round(stats['batched_items'] / stats['batches'], 2) if stats['batches'] else 0.0
+        return stats
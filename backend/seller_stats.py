@@ -0,0 +1,115 @@
+import sys
+
+# --- Per-seller Product Counters ---
+# seller_product_stats holds each seller's accepted and rejected product counts.
+# Triggers from migrations/004_seller_product_stats.sql keep it in step with
+# accepted_products / rejected_products, so reading the counts is one primary-key
+# lookup. This module reads the table and can rebuild or verify it:
+#
+#   python seller_stats.py --rebuild [seller_id]   # recount from the product tables
+#   python seller_stats.py --check                 # report sellers whose counts drifted (exit 1)
+
+# Counts straight from the product tables, as the dashboard used to compute them.
+ACTUAL_COUNTS_SQL = """
+    WITH accepted AS (
+        SELECT p.seller_id, count(*) AS n
+        FROM accepted_products ap JOIN product p ON ap.product_id = p.product_id
+        GROUP BY p.seller_id
+    ), rejected AS (
+        SELECT p.seller_id, count(*) AS n
+        FROM rejected_products rp JOIN product p ON rp.product_id = p.product_id
+        GROUP BY p.seller_id
+    )
+    SELECT se.seller_id, coalesce(a.n, 0) AS accepted_products, coalesce(r.n, 0) AS rejected_products
+    FROM seller se
+    LEFT JOIN accepted a ON a.seller_id = se.seller_id
+    LEFT JOIN rejected r ON r.seller_id = se.seller_id
+    WHERE %(seller_id)s::integer IS NULL OR se.seller_id = %(seller_id)s
+"""
+
+
+def get_seller_counts(cur, seller_id):
+    """(accepted, rejected) for a seller; a seller without a stats row has no products yet."""
+    cur.execute(
+        "SELECT accepted_products, rejected_products FROM seller_product_stats WHERE seller_id = %s;",
+        (seller_id,)
+    )
+    row = cur.fetchone()
+    return (row[0], row[1]) if row else (0, 0)
+
+
+def get_unfinished_counts(cur, seller_id):
+    """(pending, failed) async analyses for a seller (migrations/005_product_analysis_status.sql)."""
+    cur.execute(
+        """
+        SELECT count(*) FILTER (WHERE analysis_status = 'pending'), count(*) FILTER (WHERE analysis_status = 'failed')
+        FROM product WHERE seller_id = %s AND analysis_status IS NOT NULL;
+        """,
+        (seller_id,)
+    )
+    return tuple(cur.fetchone())
+
+
+def rebuild_stats(cur, seller_id=None):
+    """
+    Recounts every seller (or one) and overwrites their stats rows. Blocks writes to
+    the verdict tables until the caller commits, so no trigger update is lost.
+    Returns the number of rows written.
+    """
+    cur.execute("LOCK TABLE accepted_products, rejected_products IN SHARE MODE;")
+    cur.execute(f"""
+        INSERT INTO seller_product_stats AS s (seller_id, accepted_products, rejected_products)
+        SELECT seller_id, accepted_products, rejected_products FROM ({ACTUAL_COUNTS_SQL}) actual
+        ON CONFLICT (seller_id) DO UPDATE SET
+            accepted_products = EXCLUDED.accepted_products,
+            rejected_products = EXCLUDED.rejected_products,
+            updated_at = now();
+    """, {"seller_id": seller_id})
+    return cur.rowcount
+
+
+def check_stats(cur):
+    """Returns [(seller_id, stored (accepted, rejected), actual (accepted, rejected))] that differ."""
+    cur.execute(f"""
+        SELECT
+            coalesce(actual.seller_id, s.seller_id),
+            s.accepted_products, s.rejected_products,
+            actual.accepted_products, actual.rejected_products
+        FROM ({ACTUAL_COUNTS_SQL}) actual
+        FULL JOIN seller_product_stats s ON s.seller_id = actual.seller_id
+        WHERE s.accepted_products IS DISTINCT FROM actual.accepted_products
+           OR s.rejected_products IS DISTINCT FROM actual.rejected_products
+        ORDER BY 1;
+    """, {"seller_id": None})
+    mismatches = []
+    for seller_id, stored_accepted, stored_rejected, accepted, rejected in cur.fetchall():
+        # A seller with nothing uploaded yet may simply have no stats row.
+        if stored_accepted is None and accepted == 0 and rejected == 0:
+            continue
+        mismatches.append((seller_id, (stored_accepted, stored_rejected), (accepted, rejected)))
+    return mismatches
+
+
+if __name__ == '__main__':
+    # Usage: python seller_stats.py --rebuild [seller_id] | --check
+    if len(sys.argv) < 2 or sys.argv[1] not in ('--rebuild', '--check'):
+        print("Usage: python seller_stats.py --rebuild [seller_id] | --check")
+        sys.exit(1)
+    from db import get_db_connection
+    conn = get_db_connection()
+    try:
+        cur = conn.cursor()
+        if sys.argv[1] == '--rebuild':
+            seller_id = int(sys.argv[2]) if len(sys.argv) > 2 else None
+            written = rebuild_stats(cur, seller_id)
+            conn.commit()
+            print(f"Done. {written} seller stats rows rebuilt.")
+        else:
+            mismatches = check_stats(cur)
+            conn.rollback()
+            for seller_id, stored, actual in mismatches:
+                print(f"Seller {seller_id}: stored accepted/rejected {stored}, actual {actual}")
+            print(f"{len(mismatches)} sellers out of step." if mismatches else "All seller stats are consistent.")
+            sys.exit(1 if mismatches else 0)
+    finally:
+        conn.close()
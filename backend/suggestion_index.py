@@ -0,0 +1,235 @@
+import bisect
+import logging
+import os
+import select
+import threading
+import time
+
+import psycopg2
+
+import db
+
+# --- In-memory Autocomplete Index ---
+# Search suggestions used to run ILIKE '%q%' over product JOIN accepted_products
+# on every keystroke. The accepted product names are now held in memory:
+#   - a sorted array of (lowercased name, product_id) answers prefix queries with bisect
+#   - a trigram -> product_id postings map narrows infix queries to a few candidates
+# Prefix matches rank first, then infix matches, each in name order.
+#
+# Services that accept, rename or delete products call notify_product_change()
+# inside their transaction. That sends a PostgreSQL NOTIFY on commit, and every
+# process holding an index reloads just those products. A full rebuild still
+# runs every SUGGESTION_REBUILD_INTERVAL seconds and after a lost connection.
+#
+# The listener thread also does the initial load, right after LISTEN, so nothing
+# committed in between is missed and the names are read once, not twice. Until
+# that load succeeds get_suggestion_index() raises and callers fall back to SQL;
+# the listener retries with backoff, so an outage does not mean a reload per keystroke.
+
+SUGGESTION_CHANNEL = 'product_suggestions'
+SUGGESTION_LIMIT = int(os.environ.get('SUGGESTION_LIMIT', 10))
+SUGGESTION_REBUILD_INTERVAL = float(os.environ.get('SUGGESTION_REBUILD_INTERVAL', 60 * 60))
+SUGGESTION_LOAD_WAIT = float(os.environ.get('SUGGESTION_LOAD_WAIT', 10))  # first request waits this long
+SUGGESTION_RETRY_DELAY = 5       # seconds before reconnecting; doubles per failure
+SUGGESTION_RETRY_MAX_DELAY = 60
+# Above this many IDs a notification just asks for a full rebuild (NOTIFY payloads are small).
+NOTIFY_MAX_IDS = 500
+
+ACCEPTED_NAMES_SQL = """
+    SELECT p.product_id, p.product_name
+    FROM product p
+    JOIN accepted_products ap ON p.product_id = ap.product_id
+"""
+
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SuggestionIndex:
+    def __init__(self, rows=None):
+        self.lock = threading.RLock()
+        self.names = {}      # product_id -> product_name
+        self.sorted = []     # sorted [(name lowercased, product_id)]
+        self.postings = {}   # trigram -> {product_id}
+        self.loaded_at = None
+        self.ready = threading.Event()  # set once the first full load is in
+        if rows is not None:
+            self.replace(rows)
+
+    def __len__(self):
+        return len(self.names)
+
+    def replace(self, rows):
+        """Rebuilds the whole index from (product_id, product_name) rows."""
+        names = {product_id: name for product_id, name in rows if name}
+        sorted_names = sorted((name.lower(), product_id) for product_id, name in names.items())
+        postings = {}
+        for key, product_id in sorted_names:
+            for trigram in trigrams(key):
+                postings.setdefault(trigram, set()).add(product_id)
+        with self.lock:
+            self.names, self.sorted, self.postings = names, sorted_names, postings
+            self.loaded_at = time.time()
+        self.ready.set()
+
+    def remove(self, product_id):
+        with self.lock:
+            name = self.names.pop(product_id, None)
+            if name is None:
+                return
+            key = (name.lower(), product_id)
+            position = bisect.bisect_left(self.sorted, key)
+            if position < len(self.sorted) and self.sorted[position] == key:
+                del self.sorted[position]
+            for trigram in trigrams(key[0]):
+                ids = self.postings.get(trigram)
+                if ids is not None:
+                    ids.discard(product_id)
+                    if not ids:
+                        del self.postings[trigram]
+
+    def upsert(self, product_id, name):
+        with self.lock:
+            self.remove(product_id)
+            if not name:
+                return
+            self.names[product_id] = name
+            key = (name.lower(), product_id)
+            bisect.insort(self.sorted, key)
+            for trigram in trigrams(key[0]):
+                self.postings.setdefault(trigram, set()).add(product_id)
+
+    def search(self, query, limit=SUGGESTION_LIMIT):
+        """Prefix matches first, then names containing the query; same output as the old SQL."""
+        q = query.strip().lower()
+        if not q:
+            return []
+        with self.lock:
+            results = []
+            position = bisect.bisect_left(self.sorted, (q,))
+            while position < len(self.sorted) and len(results) < limit:
+                name, product_id = self.sorted[position]
+                if not name.startswith(q):
+                    break
+                results.append(product_id)
+                position += 1
+
+            if len(results) < limit:
+                seen = set(results)
+                if len(q) >= 3:
+                    grams = sorted(trigrams(q), key=lambda g: len(self.postings.get(g, ())))
+                    candidates = set(self.postings.get(grams[0], ()))
+                    for trigram in grams[1:]:
+                        candidates &= self.postings.get(trigram, set())
+                        if not candidates:
+                            break
+                    keys = sorted((self.names[i].lower(), i) for i in candidates if i not in seen)
+                else:
+                    # One or two characters: too short for trigrams, scan the (already sorted) names.
+                    keys = (key for key in self.sorted if key[1] not in seen)
+                for name, product_id in keys:
+                    if q in name:
+                        results.append(product_id)
+                        if len(results) >= limit:
+                            break
+
+            return [{"product_id": product_id, "product_name": self.names[product_id]} for product_id in results]
+
+
+def notify_product_change(cur, product_ids):
+    """
+    Tells every suggestion index that these products were accepted, renamed or
+    deleted. Call it inside the writing transaction; it is delivered on commit.
+    """
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+    payload = '*' if len(product_ids) > NOTIFY_MAX_IDS else ','.join(str(i) for i in product_ids)
+    cur.execute("SELECT pg_notify(%s, %s);", (SUGGESTION_CHANNEL, payload))
+
+
+# --- Shared index instance ---
+_index = None
+_index_lock = threading.Lock()
+
+
+def load_rows(product_ids=None):
+    """(product_id, product_name) of accepted products, optionally only the given ones."""
+    conn = db.get_db_connection()
+    try:
+        with conn.cursor() as cur:
+            if product_ids is None:
+                cur.execute(ACCEPTED_NAMES_SQL)
+            else:
+                cur.execute(ACCEPTED_NAMES_SQL + " WHERE p.product_id = ANY(%s)", (list(product_ids),))
+            return cur.fetchall()
+    finally:
+        conn.close()
+
+
+def apply_change(index, payload):
+    """Reloads the products named in a notification payload."""
+    if payload == '*':
+        index.replace(load_rows())
+        return
+    product_ids = [int(i) for i in payload.split(',') if i.strip().isdigit()]
+    found = dict(load_rows(product_ids))
+    for product_id in product_ids:
+        if product_id in found:
+            index.upsert(product_id, found[product_id])
+        else:
+            index.remove(product_id)  # deleted, or no longer accepted
+
+
+def listen_for_changes(index):
+    """Background loop: loads the index, applies NOTIFY messages, rebuilds after reconnects and periodically."""
+    delay = SUGGESTION_RETRY_DELAY
+    while True:
+        conn = None
+        try:
+            # A dedicated connection: LISTEN needs one that is never handed to anyone else.
+            conn = psycopg2.connect(**db.DB_CONFIG)
+            conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+            with conn.cursor() as cur:
+                cur.execute(f"LISTEN {SUGGESTION_CHANNEL};")
+            # The initial load, or anything that changed while we were not listening.
+            index.replace(load_rows())
+            logging.info(f"Suggestion index loaded with {len(index)} products.")
+            delay = SUGGESTION_RETRY_DELAY
+            while True:
+                if select.select([conn], [], [], 5) != ([], [], []):
+                    conn.poll()
+                    while conn.notifies:
+                        apply_change(index, conn.notifies.pop(0).payload)
+                if time.time() - index.loaded_at >= SUGGESTION_REBUILD_INTERVAL:
+                    index.replace(load_rows())
+        except Exception as e:
+            logging.error(f"Suggestion index listener error: {e}; reconnecting in {delay:.0f}s.")
+            time.sleep(delay)
+            delay = min(delay * 2, SUGGESTION_RETRY_MAX_DELAY)
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+def get_suggestion_index():
+    """
+    Returns the process-wide index. The first call starts its listener and waits up to
+    SUGGESTION_LOAD_WAIT seconds for the initial load. Raises RuntimeError while the
+    index is not loaded yet.
+    """
+    global _index
+    started = False
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = SuggestionIndex()
+                threading.Thread(target=listen_for_changes, args=(_index,), name='suggestion-listener',
+                                 daemon=True).start()
+                started = True
+    if started:
+        _index.ready.wait(SUGGESTION_LOAD_WAIT)
+    if not _index.ready.is_set():
+        raise RuntimeError("Suggestion index is not loaded yet.")
+    return _index
@@ -5,6 +5,7 @@ import BackButton from "./components/BackButton";
 import { FontAwesomeIcon } from "@fortawesome/react-fontawesome";
 import { faEye, faEyeSlash } from "@fortawesome/free-solid-svg-icons";
 import { faBars, faTimes, faUser, faCamera, faUpload, faArrowLeft, faSave, faEdit, faTrash, faSearch } from "@fortawesome/free-solid-svg-icons";
+import { apiUrl } from "./api";
 function SellerLog() {
   const navigate = useNavigate();
   const [formData, setFormData] = useState({
@@ -29,7 +30,7 @@ function SellerLog() {
     setSuccess("");
 
     try {
-      const response = await fetch("http://localhost:5000/register", {
+      const response = await fetch(apiUrl(5000, "/register"), {
         method: "POST",
         headers: {
           "Content-Type": "application/json"
@@ -5,6 +5,7 @@ import BackButton from "./components/BackButton"; // Assuming you have this comp
 import { FontAwesomeIcon } from "@fortawesome/react-fontawesome";
 import { faEye, faEyeSlash } from "@fortawesome/free-solid-svg-icons";
 import { faBars, faTimes, faUser, faCamera, faUpload, faArrowLeft, faSave, faEdit, faTrash, faSearch } from "@fortawesome/free-solid-svg-icons";
+import { apiUrl } from "./api";
 function SellerLog2() {
   const navigate = useNavigate();
   const [loginData, setLoginData] = useState({ email: "", password: "" });
@@ -21,7 +22,7 @@ function SellerLog2() {
 
     try {
       // Changed the URL to localhost:5000 for consistency and local development best practice
-      const response = await fetch("http://localhost:5000/login", { 
+      const response = await fetch(apiUrl(5000, "/login"), { 
         method: "POST",
         headers: { "Content-Type": "application/json" },
         body: JSON.stringify(loginData)
@@ -11,6 +11,7 @@ import { faCheckCircle, faTimesCircle, faExclamationCircle } from "@fortawesome/
 import { DndContext, closestCenter } from "@dnd-kit/core";
 import { arrayMove, SortableContext, useSortable, horizontalListSortingStrategy } from "@dnd-kit/sortable";
 import { CSS } from "@dnd-kit/utilities";
+import { apiUrl } from "./api";
 
 // HELPER COMPONENT for a single draggable image
 function SortableImage({ image, index, onRemove }) {
@@ -47,6 +48,8 @@ function SellerDashboard() {
   const [showExplanation, setShowExplanation] = useState(false);
   const [acceptedProducts, setAcceptedProducts] = useState([]);
   const [rejectedProducts, setRejectedProducts] = useState([]);
+  const [acceptedNext, setAcceptedNext] = useState(null);
+  const [rejectedNext, setRejectedNext] = useState(null);
   const [loadingProducts, setLoadingProducts] = useState(false);
   const [sellerDetails, setSellerDetails] = useState(null);
   const [isEditing, setIsEditing] = useState(false);
@@ -80,48 +83,47 @@ function SellerDashboard() {
 
     if (storedSellerId) {
       setSellerInfo({ seller_id: parseInt(storedSellerId, 10), name: storedSellerName || "", email: storedSellerEmail || "" });
-      if (currentDashboardView === "accepted") fetchAcceptedProducts(storedSellerId);
-      else if (currentDashboardView === "rejected") fetchRejectedProducts(storedSellerId);
-      else if (currentDashboardView === "overview") fetchProductCounts(storedSellerId);
+      if (currentDashboardView === "accepted") fetchDashboard(storedSellerId, "accepted");
+      else if (currentDashboardView === "rejected") fetchDashboard(storedSellerId, "rejected");
+      else if (currentDashboardView === "overview") fetchDashboard(storedSellerId);
     } else {
       navigate("/seller-login");
     }
   }, [currentDashboardView, navigate]);
 
-  const fetchProductCounts = async (sellerId) => {
+  // One request for profile, counts and the first page of each product list (or just the ones in `include`)
+  const fetchDashboard = async (sellerId, include) => {
+    const withProducts = !include || include.includes("accepted") || include.includes("rejected");
+    if (withProducts) setLoadingProducts(true);
     try {
-      const response = await fetch(`http://localhost:5009/api/seller/${sellerId}/product-counts`);
-      if (!response.ok) throw new Error("Failed to fetch product counts.");
+      const query = include ? `?include=${include}` : "";
+      const response = await fetch(apiUrl(5009, `/api/seller/${sellerId}/dashboard${query}`));
+      if (!response.ok) throw new Error("Failed to fetch the seller dashboard.");
       const data = await response.json();
-      setProductCounts(data);
-    } catch (error) { console.error("Error fetching product counts:", error); }
+      if (data.profile) { setSellerDetails(data.profile); setEditedDetails(data.profile); }
+      if (data.counts) setProductCounts(data.counts);
+      if (data.accepted) { setAcceptedProducts(data.accepted.items); setAcceptedNext(data.accepted.next); }
+      if (data.rejected) { setRejectedProducts(data.rejected.items); setRejectedNext(data.rejected.next); }
+    } catch (error) { console.error("Error fetching seller dashboard:", error); }
+    finally { if (withProducts) setLoadingProducts(false); }
   };
 
-  const fetchAcceptedProducts = async (sellerId) => {
-    setLoadingProducts(true);
+  // Further pages continue from the dashboard's cursor on the product list endpoints
+  const loadMoreProducts = async (status) => {
+    const cursor = status === "accepted" ? acceptedNext : rejectedNext;
+    if (!cursor) return;
     try {
-      const response = await fetch(`http://localhost:5002/api/seller/${sellerId}/accepted-products`);
-      if (!response.ok) throw new Error("Failed to fetch accepted products.");
+      const response = await fetch(apiUrl(5002, `/api/seller/${sellerInfo.seller_id}/${status}-products?cursor=${encodeURIComponent(cursor)}`));
+      if (!response.ok) throw new Error(`Failed to fetch ${status} products.`);
       const data = await response.json();
-      setAcceptedProducts(data);
-    } catch (error) { console.error("Error fetching accepted products:", error); setAcceptedProducts([]); }
-    finally { setLoadingProducts(false); }
-  };
-
-  const fetchRejectedProducts = async (sellerId) => {
-    setLoadingProducts(true);
-    try {
-      const response = await fetch(`http://localhost:5002/api/seller/${sellerId}/rejected-products`);
-      if (!response.ok) throw new Error("Failed to fetch rejected products.");
-      const data = await response.json();
-      setRejectedProducts(data);
-    } catch (error) { console.error("Error fetching rejected products:", error); setRejectedProducts([]); }
-    finally { setLoadingProducts(false); }
+      if (status === "accepted") { setAcceptedProducts((items) => [...items, ...data.items]); setAcceptedNext(data.next); }
+      else { setRejectedProducts((items) => [...items, ...data.items]); setRejectedNext(data.next); }
+    } catch (error) { console.error(`Error fetching more ${status} products:`, error); }
   };
   
   const handleViewProductDetails = async (productId) => {
     try {
-      const response = await fetch(`http://localhost:5014/api/product/${productId}`);
+      const response = await fetch(apiUrl(5014, `/api/product/${productId}`));
       if (!response.ok) throw new Error("Failed to fetch product details.");
       const data = await response.json();
       setSelectedProductDetails(data);
@@ -137,7 +139,7 @@ function SellerDashboard() {
       return;
     }
     try {
-      const response = await fetch(`http://localhost:5014/api/product/delete/${productId}`, {
+      const response = await fetch(apiUrl(5014, `/api/product/delete/${productId}`), {
         method: 'DELETE',
       });
       if (!response.ok) {
@@ -145,10 +147,8 @@ function SellerDashboard() {
         throw new Error(errorData.error || "Failed to delete product.");
       }
       alert("Product deleted successfully.");
-      if (status === 'accepted') {
-        fetchAcceptedProducts(sellerInfo.seller_id);
-      } else if (status === 'rejected') {
-        fetchRejectedProducts(sellerInfo.seller_id);
+      if (status === 'accepted' || status === 'rejected') {
+        fetchDashboard(sellerInfo.seller_id, `${status},counts`);
       }
     } catch (error) {
       console.error("Error deleting product:", error);
@@ -166,7 +166,7 @@ function SellerDashboard() {
 
   const fetchSellerDetails = async (sellerId) => {
     try {
-      const response = await fetch(`http://localhost:5003/api/seller/${sellerId}`);
+      const response = await fetch(apiUrl(5003, `/api/seller/${sellerId}`));
       if (!response.ok) throw new Error("Failed to fetch seller details.");
       const data = await response.json();
       setSellerDetails(data);
@@ -183,7 +183,7 @@ function SellerDashboard() {
 
   const handleSaveAccount = async () => {
     try {
-      const response = await fetch(`http://localhost:5003/api/seller/update/${sellerInfo.seller_id}`, {
+      const response = await fetch(apiUrl(5003, `/api/seller/update/${sellerInfo.seller_id}`), {
         method: 'PUT',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(editedDetails),
@@ -210,7 +210,7 @@ function SellerDashboard() {
       return;
     }
     try {
-      const response = await fetch(`http://localhost:5003/api/seller/delete/${sellerInfo.seller_id}`, {
+      const response = await fetch(apiUrl(5003, `/api/seller/delete/${sellerInfo.seller_id}`), {
         method: 'DELETE',
       });
       if (!response.ok) {
@@ -249,7 +249,7 @@ function SellerDashboard() {
     const formData = new FormData();
     formData.append("image", ingredientImage);
     try {
-      const response = await fetch("http://localhost:5001/api/ocr", { method: "POST", body: formData });
+      const response = await fetch(apiUrl(5001, "/api/ocr"), { method: "POST", body: formData });
       if (!response.ok) {
         const errorData = await response.json();
         throw new Error(errorData.error || `HTTP error! Status: ${response.status}`);
@@ -309,14 +309,14 @@ function SellerDashboard() {
         formData.append(`images`, image);
     });
     try {
-      const response = await fetch("http://localhost:5000/api/upload-product", { method: "POST", body: formData });
+      const response = await fetch(apiUrl(5000, "/api/upload-product"), { method: "POST", body: formData });
       if (!response.ok) {
         const errorData = await response.json();
         throw new Error(errorData.error || "Failed to upload product.");
       }
       const result = await response.json();
       setAnalysisResult(result);
-      fetchProductCounts(storedSellerId);
+      fetchDashboard(storedSellerId, "counts");
     } catch (error) {
       console.error("Error uploading product:", error);
       alert(`Error: ${error.message}`);
@@ -329,7 +329,7 @@ function SellerDashboard() {
   const handleSaveProductDetails = async () => {
     if (!selectedProductDetails) return;
     try {
-      const response = await fetch(`http://localhost:5014/api/product/update/${selectedProductDetails.product_id}`, {
+      const response = await fetch(apiUrl(5014, `/api/product/update/${selectedProductDetails.product_id}`), {
         method: 'PUT',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify(editedDetails),
@@ -357,7 +357,7 @@ function SellerDashboard() {
     if (view === "account-details" && sellerInfo.seller_id) {
       fetchSellerDetails(sellerInfo.seller_id);
     } else if (view === 'overview') {
-      if (sellerInfo.seller_id) fetchProductCounts(sellerInfo.seller_id);
+      if (sellerInfo.seller_id) fetchDashboard(sellerInfo.seller_id, "counts");
     }
   };
 
@@ -593,7 +593,7 @@ function SellerDashboard() {
                 {rejectedProducts.map((product) => (
                   <div key={product.product_id} className="seller-product-card" style={{ position: 'relative' }} onClick={() => handleViewProductDetails(product.product_id)}>
                     <div className="seller-product-image-container">
-                      {product.image_base64 && <img src={`data:image/jpeg;base64,${product.image_base64}`} alt={product.product_name} className="seller-product-image" />}
+                      {(product.image_base64 || product.thumbnail_url) && <img src={product.image_base64 ? `data:image/jpeg;base64,${product.image_base64}` : product.thumbnail_url} alt={product.product_name} className="seller-product-image" />}
                     </div>
                     <div className="seller-product-info">
                       <h3 className="seller-product-name">{product.product_name}</h3>
@@ -618,6 +618,7 @@ function SellerDashboard() {
                 ))}
               </div>
             ) : <p>No rejected products found.</p>}
+            {!loadingProducts && rejectedNext && <button className="seller-action-button seller-secondary-button" onClick={() => loadMoreProducts("rejected")}>Load more</button>}
           </div>
         );
       case "accepted":
@@ -630,7 +631,7 @@ function SellerDashboard() {
                 {acceptedProducts.map((product) => (
                   <div key={product.product_id} className="seller-product-card" style={{ position: 'relative' }} onClick={() => handleViewProductDetails(product.product_id)}>
                      <div className="seller-product-image-container">
-                      {product.image_base64 && <img src={`data:image/jpeg;base64,${product.image_base64}`} alt={product.product_name} className="seller-product-image" />}
+                      {(product.image_base64 || product.thumbnail_url) && <img src={product.image_base64 ? `data:image/jpeg;base64,${product.image_base64}` : product.thumbnail_url} alt={product.product_name} className="seller-product-image" />}
                     </div>
                     <div className="seller-product-info">
                       <h3 className="seller-product-name">{product.product_name}</h3>
@@ -655,6 +656,7 @@ function SellerDashboard() {
                 ))}
               </div>
             ) : <p>No accepted products found.</p>}
+            {!loadingProducts && acceptedNext && <button className="seller-action-button seller-secondary-button" onClick={() => loadMoreProducts("accepted")}>Load more</button>}
           </div>
         );
       case "overview":
@@ -666,6 +668,9 @@ function SellerDashboard() {
               <div className="seller-metric-card"><h3>Total Products</h3><p>{productCounts.total_products}</p></div>
               <div className="seller-metric-card"><h3>Approved Products</h3><p>{productCounts.accepted_products}</p></div>
               <div className="seller-metric-card"><h3>Rejected Products</h3><p>{productCounts.rejected_products}</p></div>
+              {(productCounts.pending_products > 0 || productCounts.failed_products > 0) && (
+                <div className="seller-metric-card"><h3>Awaiting Analysis</h3><p>{productCounts.pending_products || 0}{productCounts.failed_products > 0 && ` (${productCounts.failed_products} failed)`}</p></div>
+              )}
             </div>
           </div>
         );
@@ -5,6 +5,7 @@ import logo from "./assets/logo_cut.png";
 import { FontAwesomeIcon } from "@fortawesome/react-fontawesome";
 import { faBars, faTimes, faArrowLeft, faSearch, faCamera, faUpload, faCheckCircle, faTimesCircle, faExclamationCircle, faFilter, faAngleDown } from "@fortawesome/free-solid-svg-icons";
 import { PieChart, Pie, Cell, Tooltip, ResponsiveContainer } from "recharts";
+import { apiUrl } from "./api";
 
 // Function to handle custom dialogs
 const showCustomDialog = (message) => {
@@ -63,13 +64,13 @@ function User() {
     
     if (filters.searchTerm) {
       const params = new URLSearchParams({ search: filters.searchTerm });
-      url = `http://localhost:5004/api/search/filter-products?${params.toString()}`;
+      url = apiUrl(5004, `/api/search/filter-products?${params.toString()}`);
     } else if (filters.skinTypes && filters.skinTypes.length > 0) {
       const params = new URLSearchParams();
       params.append('skin_types', filters.skinTypes.join(','));
-      url = `http://localhost:5010/api/products/filter?${params.toString()}`;
+      url = apiUrl(5010, `/api/products/filter?${params.toString()}`);
     } else {
-      url = "http://localhost:5008/api/products";
+      url = apiUrl(5008, "/api/products");
     }
 
     try {
@@ -98,7 +99,7 @@ function User() {
     if (searchQuery.trim() !== '') {
         searchTimeoutRef.current = setTimeout(async () => {
             try {
-                const response = await fetch(`http://localhost:5004/api/search/suggestions?q=${searchQuery}`);
+                const response = await fetch(apiUrl(5004, `/api/search/suggestions?q=${searchQuery}`));
                 if (!response.ok) throw new Error('Failed to fetch suggestions');
                 const data = await response.json();
                 setSearchResults(data);
@@ -127,7 +128,7 @@ function User() {
     setCurrentImageIndex(0);
     
     try {
-      const response = await fetch(`http://localhost:5011/api/product/details/${productId}`); 
+      const response = await fetch(apiUrl(5011, `/api/product/details/${productId}`)); 
       if (!response.ok) {
         const errorData = await response.json().catch(() => ({}));
         throw new Error(errorData.error || `HTTP error! status: ${response.status}`);
@@ -208,7 +209,7 @@ function User() {
     const formData = new FormData();
     formData.append("image", ingredientImage);
     try {
-      const response = await fetch("http://localhost:5001/api/ocr", { method: "POST", body: formData });
+      const response = await fetch(apiUrl(5001, "/api/ocr"), { method: "POST", body: formData });
       if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
       const data = await response.json();
       setExtractedText(data.text);
@@ -233,7 +234,7 @@ function User() {
     setCurrentDashboardView("analysis");
 
     try {
-        const response = await fetch("http://localhost:5012/api/check-product", {
+        const response = await fetch(apiUrl(5012, "/api/check-product"), {
             method: "POST",
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({
@@ -416,7 +417,7 @@ function User() {
         );
     }
     
-    const { product_name, description, price, skin_type, seller_email, images, analysis } = selectedProductDetails;
+    const { product_name, description, price, skin_type, seller_email, images, thumbnails, analysis } = selectedProductDetails;
     const { overall_verdict, summary, highly_contributing, moderate_ingredients, least_contributing, overall_explanation } = analysis;
 
     const allIngredients = [...(highly_contributing || []), ...(moderate_ingredients || []), ...(least_contributing || [])];
@@ -467,7 +468,7 @@ function User() {
                 <div className="image-gallery">
                     <div className="main-image-view">
                         {images && images.length > 0 && (
-                            <img src={`data:image/jpeg;base64,${images[currentImageIndex]}`} alt={product_name} />
+                            <img src={images[currentImageIndex]} alt={product_name} />
                         )}
                     </div>
                     <div className="thumbnail-list">
@@ -477,7 +478,7 @@ function User() {
                                 className={`thumbnail-item ${index === currentImageIndex ? 'active' : ''}`}
                                 onClick={() => setCurrentImageIndex(index)}
                             >
-                                <img src={`data:image/jpeg;base64,${img}`} alt={`Product thumbnail ${index + 1}`} />
+                                <img src={(thumbnails && thumbnails[index]) || img} alt={`Product thumbnail ${index + 1}`} />
                             </div>
                         ))}
                     </div>
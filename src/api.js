@@ -0,0 +1,6 @@
+// Backend base URL. Every Flask service listens on its own port by default;
+// set VITE_API_GATEWAY (e.g. http://localhost:8000) to send all calls to the
+// single-process gateway in backend/gateway.py instead.
+const GATEWAY = import.meta.env.VITE_API_GATEWAY;
+
+export const apiUrl = (port, path) => `${GATEWAY || `http://localhost:${port}`}${path}`;